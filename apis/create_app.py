@@ -1,6 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from prometheus_client import make_asgi_app
 from .v1.configs.swagger_config import swagger_config
+from .v1.utils.constants import METRICS_ENABLED, STORAGE_LOCAL_BASE_URL
+from .v1.providers import google_auth, storage_db
+from .v1.providers.storage_provider.local_provider import LocalStorageProvider
 
 #Define create app function
 def create_app():
@@ -16,5 +21,16 @@ def create_app():
         allow_headers=["*"],
     )
 
+    #Close pooled HTTP connections on shutdown
+    app.add_event_handler("shutdown", google_auth.aclose)
+
+    #Expose Prometheus metrics
+    if METRICS_ENABLED:
+        app.mount("/metrics", make_asgi_app())
+
+    #Serve the URLs of files on the local disk, like the public URLs of the cloud storage
+    if isinstance(storage_db, LocalStorageProvider) and STORAGE_LOCAL_BASE_URL.startswith("/"):
+        app.mount(STORAGE_LOCAL_BASE_URL.rstrip("/"), StaticFiles(directory=storage_db.files_dir), name="storage")
+
 
     return app
\ No newline at end of file
@@ -1,7 +1,89 @@
 import os
-from qdrant_client import QdrantClient
+from pydantic import BaseModel, Field
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.http import models
+from ..utils.constants import VECTOR_FILTER_FIELDS
 
-qdrant_client  = QdrantClient(
-    host=os.environ.get("QDRANT_HOST"),
-    api_key=os.environ.get("QDRANT_API_KEY"),
-)
\ No newline at end of file
+QDRANT_HOST = os.environ.get("QDRANT_HOST")
+QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY")
+QDRANT_GRPC_PORT = int(os.environ.get("QDRANT_GRPC_PORT", 6334))
+QDRANT_TIMEOUT = int(os.environ.get("QDRANT_TIMEOUT", 30))
+
+
+def create_qdrant_client() -> QdrantClient:
+    # Sync client over gRPC, shared by the whole process
+    return QdrantClient(
+        host=QDRANT_HOST,
+        api_key=QDRANT_API_KEY,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=True,
+        timeout=QDRANT_TIMEOUT,
+    )
+
+
+def create_async_qdrant_client() -> AsyncQdrantClient:
+    # Async client over gRPC, shared by the whole process
+    return AsyncQdrantClient(
+        host=QDRANT_HOST,
+        api_key=QDRANT_API_KEY,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=True,
+        timeout=QDRANT_TIMEOUT,
+    )
+
+
+qdrant_client = create_qdrant_client()
+async_qdrant_client = create_async_qdrant_client()
+
+
+class CollectionProfile(BaseModel):
+    '''
+    Tuning profile of a Qdrant collection.
+    Trade recall against latency and memory per deployment.
+    '''
+    hnsw_m: int = Field(16, title="HNSW edges per node")
+    hnsw_ef_construct: int = Field(100, title="HNSW build-time neighbours")
+    search_ef: int = Field(128, title="HNSW search-time neighbours")
+    quantization: bool = Field(True, title="Enable int8 scalar quantization")
+    quantile: float = Field(0.99, title="Quantization quantile")
+    quantization_always_ram: bool = Field(True, title="Keep quantized vectors in RAM")
+    rescore: bool = Field(True, title="Rescore quantized results with original vectors")
+    oversampling: float = Field(2.0, title="Quantized candidates oversampling")
+    on_disk: bool = Field(True, title="Store original vectors on disk")
+    payload_indexes: list[str] = Field(
+        default_factory=lambda: list(VECTOR_FILTER_FIELDS), title="Indexed metadata fields")
+
+    def vector_params(self, size: int, distance: models.Distance) -> models.VectorParams:
+        return models.VectorParams(size=size, distance=distance, on_disk=self.on_disk)
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self) -> models.ScalarQuantization | None:
+        if not self.quantization:
+            return None
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=self.quantile,
+                always_ram=self.quantization_always_ram,
+            )
+        )
+
+    def search_params(self) -> models.SearchParams:
+        return models.SearchParams(
+            hnsw_ef=self.search_ef,
+            quantization=models.QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling,
+            ) if self.quantization else None,
+        )
+
+
+default_collection_profile = CollectionProfile(
+    hnsw_m=int(os.environ.get("QDRANT_HNSW_M", 16)),
+    hnsw_ef_construct=int(os.environ.get("QDRANT_HNSW_EF_CONSTRUCT", 100)),
+    search_ef=int(os.environ.get("QDRANT_SEARCH_EF", 128)),
+    quantization=os.environ.get("QDRANT_QUANTIZATION", "true").lower() == "true",
+    on_disk=os.environ.get("QDRANT_ON_DISK", "true").lower() == "true",
+)
@@ -0,0 +1,11 @@
+import os
+import functools
+from sentence_transformers import CrossEncoder
+
+RERANKER_MODEL = os.environ.get("RAG_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+
+# Loaded on first use, only when cross-encoder reranking is enabled
+@functools.lru_cache(maxsize=1)
+def get_cross_encoder() -> CrossEncoder:
+    return CrossEncoder(RERANKER_MODEL)
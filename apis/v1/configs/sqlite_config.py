@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import threading
+
+SQLITE_PATH = os.environ.get("SQLITE_PATH", os.path.join("data", "database.sqlite3"))
+SQLITE_CACHED_STATEMENTS = 256
+
+_local = threading.local()
+
+
+def get_connection(path: str = SQLITE_PATH) -> sqlite3.Connection:
+    # One connection per thread, WAL lets readers run alongside the writer
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        connection = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=SQLITE_CACHED_STATEMENTS,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        _local.connection = connection
+    return connection
@@ -1,41 +1,34 @@
 from typing import AnyStr
+import asyncio
 import datetime
-import requests
-from fastapi import HTTPException
+from fastapi import HTTPException, status
 from ..schemas.user_schema import UserSchema
-from ..providers.jwt_provider import jwt
-from ..utils.constants import GOOGLE_VERIFY_URL
+from ..providers import jwt, google_auth
+from ..utils.constants import PLACEHOLDER_IMAGE
 
 
-def login_control(access_token: AnyStr):
-    # Get User information from Google API
-    url = GOOGLE_VERIFY_URL + access_token
-    response = requests.get(url, headers={
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    })
-
-    # Handle error and response
-    if response.status_code != 200:
+async def login_control(access_token: AnyStr = None, id_token: AnyStr = None):
+    # Get User information from the Google ID token offline, or from Google API
+    if id_token:
+        google_data = await google_auth.verify_id_token(id_token)
+    elif access_token:
+        google_data = await google_auth.get_user_info(access_token)
+    else:
         raise HTTPException(
-            status_code=response.status_code,
-            detail="Google API Error"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Google Access-Token or ID-Token is required"
         )
 
-    # Get user data from Google API
-    google_data = response.json()
-
     # Check if user with email exists in Database
-    user = UserSchema.find_by_email(google_data["email"])
+    user = await asyncio.to_thread(UserSchema.find_by_email, google_data["email"])
 
     # If user does not exist, create a new user
     if not user:
-        user = UserSchema(
-            name=google_data["name"],
+        user = await asyncio.to_thread(UserSchema(
+            name=google_data.get("name", google_data["email"]),
             email=google_data["email"],
-            avatar=google_data["picture"]
-        ).create_user()
+            avatar=google_data.get("picture", PLACEHOLDER_IMAGE)
+        ).create_user)
 
     # Create JWT Token
     token = jwt.encrypt({
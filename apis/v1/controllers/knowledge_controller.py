@@ -1,13 +1,15 @@
-from typing import AnyStr, List
+from typing import AnyStr, AsyncIterator, Dict, List
 from fastapi import HTTPException, status, UploadFile, BackgroundTasks
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 import uuid
 import time
 from ..schemas.user_schema import UserSchema
 from ..schemas.knowledge_schema import KnowledgeSchema
+from ..schemas.project_schema import ProjectSchema
 from ..schemas.embedding_schema import VectorEmbeddingSchema
-from ..providers import memory_cacher, storage_db
+from ..providers import memory_cacher, storage_db, vector_db
 from ..utils.utils import get_content_type, validate_file_extension
-from ..utils.extractor import get_document_content
+from ..utils.extractor import get_document_content, get_document_splits
 
 
 def _validate_permissions(user: UserSchema):
@@ -20,6 +22,20 @@ def _validate_permissions(user: UserSchema):
     
     return True  # Nếu người dùng có quyền truy cập, trả về True
 
+def _validate_project(project_id: AnyStr, user: UserSchema):
+    # Knowledge belongs to a project the user owns or is shared with
+    if project_id not in user.projects and project_id not in user.shared:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this project."
+        )
+
+    if not ProjectSchema.find_by_id(project_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found."
+        )
+
 def get_all_knowledges(user: UserSchema):
     _validate_permissions(user)
 
@@ -27,7 +43,7 @@ def get_all_knowledges(user: UserSchema):
     knowledges = KnowledgeSchema.find_all()  # Lấy tất cả kiến thức
     return knowledges
 
-def _upload_knowledge_data(data: bytes, filename: AnyStr, watch_id: AnyStr, knowledge: KnowledgeSchema):
+def _upload_knowledge_data(data: bytes | AnyStr, filename: AnyStr, watch_id: AnyStr, knowledge: KnowledgeSchema):
     # Get content type of file
     content_type = get_content_type(filename)
     path, url = storage_db.upload(data, filename, content_type)
@@ -36,24 +52,33 @@ def _upload_knowledge_data(data: bytes, filename: AnyStr, watch_id: AnyStr, know
     memory_cacher.get(watch_id)["percent"][filename] += 5
 
 
-def _upload_multiple_knowledge(knowledges: List[bytes], filenames: List[AnyStr], watch_id: AnyStr):
-    for knowledge, filename in zip(knowledges, filenames):
+def _index_knowledge(cache_file_path: AnyStr, knowledge: KnowledgeSchema):
+    # Embed the chunks of the file, stamped with the knowledge and its project
+    vector_db.upload_documents_and_load_collection(
+        get_document_splits(cache_file_path),
+        knowledge_id=knowledge.id,
+        project_id=knowledge.project_id,
+    )
+
+
+def _upload_multiple_knowledge(cache_file_paths: List[AnyStr], filenames: List[AnyStr], project_id: AnyStr, watch_id: AnyStr):
+    for cache_file_path, filename in zip(cache_file_paths, filenames):
         memory_cacher.get(watch_id)["percent"][filename] = 0
 
         # Create Knowledge document in database
-        knowledge_instance = KnowledgeSchema(name=filename).create_knowledge()
+        knowledge_instance = KnowledgeSchema(name=filename, project_id=project_id).create_knowledge()
         memory_cacher.get(watch_id)["percent"][filename] += 10
 
         # Upload to storage
         try:
-            _upload_knowledge_data(knowledge, filename, watch_id, knowledge_instance)
+            _upload_knowledge_data(cache_file_path, filename, watch_id, knowledge_instance)
         except Exception as e:
+            memory_cacher.remove_cache_file(filename)
             memory_cacher.get(watch_id)["error"][filename] = str(e)
             continue
 
-        # Save file to cache folder
-        cache_file_path = memory_cacher.save_cache_file(knowledge, filename)
         knowledge_content = get_document_content(cache_file_path)
+        _index_knowledge(cache_file_path, knowledge_instance)
         memory_cacher.remove_cache_file(filename)
         memory_cacher.get(watch_id)["percent"][filename] += 5
 
@@ -65,23 +90,23 @@ def _upload_multiple_knowledge(knowledges: List[bytes], filenames: List[AnyStr],
     time.sleep(10)
     memory_cacher.remove(watch_id)
 
-def _upload_single_knowledge(knowledge: bytes, filename: AnyStr, watch_id: AnyStr):
+def _upload_single_knowledge(cache_file_path: AnyStr, filename: AnyStr, project_id: AnyStr, watch_id: AnyStr):
     memory_cacher.get(watch_id)["percent"][filename] = 0
 
     # Create Knowledge document in database
-    knowledge_instance = KnowledgeSchema(name=filename).create_knowledge()  # Sửa lại đây
+    knowledge_instance = KnowledgeSchema(name=filename, project_id=project_id).create_knowledge()  # Sửa lại đây
     memory_cacher.get(watch_id)["percent"][filename] += 10
 
     # Upload to storage
     try:
-        _upload_knowledge_data(knowledge, filename, watch_id, knowledge_instance)
+        _upload_knowledge_data(cache_file_path, filename, watch_id, knowledge_instance)
     except Exception as e:
+        memory_cacher.remove_cache_file(filename)
         memory_cacher.get(watch_id)["error"][filename] = str(e)
         return
 
-    # Save file to cache folder
-    cache_file_path = memory_cacher.save_cache_file(knowledge, filename)
     knowledge_content = get_document_content(cache_file_path)
+    _index_knowledge(cache_file_path, knowledge_instance)
     memory_cacher.remove_cache_file(filename)
     memory_cacher.get(watch_id)["percent"][filename] += 5
 
@@ -93,19 +118,19 @@ def _upload_single_knowledge(knowledge: bytes, filename: AnyStr, watch_id: AnySt
     time.sleep(10)
     memory_cacher.remove(watch_id)
 
-async def upload_knowledges_data(user: UserSchema, knowledges: List[UploadFile], bg_tasks: BackgroundTasks):
+async def upload_knowledges_data(user: UserSchema, knowledges: List[UploadFile], project_id: AnyStr, bg_tasks: BackgroundTasks):
     # Validate permission
     _validate_permissions(user)
+    _validate_project(project_id, user)
 
     # Create watch id
     watch_id = str(uuid.uuid4())
 
-    # Read files
-    files: List[bytes] = []
+    # Stream files to cache folder, the background task only gets their paths
+    cache_file_paths: List[AnyStr] = []
     filenames: List[AnyStr] = []
     for knowledge in knowledges:
-        file_content = await knowledge.read()
-        files.append(file_content)
+        cache_file_paths.append(await run_in_threadpool(memory_cacher.save_cache_stream, knowledge.file, knowledge.filename))
         filenames.append(knowledge.filename)
 
     # Initialize cache
@@ -115,19 +140,20 @@ async def upload_knowledges_data(user: UserSchema, knowledges: List[UploadFile],
     })
 
     # Upload knowledges
-    bg_tasks.add_task(_upload_multiple_knowledge, files, filenames, watch_id)
+    bg_tasks.add_task(_upload_multiple_knowledge, cache_file_paths, filenames, project_id, watch_id)
 
     return watch_id
 
-async def upload_knowledge_data(user: UserSchema, knowledge: UploadFile, bg_tasks: BackgroundTasks):
+async def upload_knowledge_data(user: UserSchema, knowledge: UploadFile, project_id: AnyStr, bg_tasks: BackgroundTasks):
     # Validate extension
     validate_file_extension(knowledge.filename)
 
     # Validate permission
     _validate_permissions(user)
+    _validate_project(project_id, user)
 
-    # Read file
-    file_content = await knowledge.read()
+    # Stream file to cache folder, large files are uploaded from it in parallel parts
+    cache_file_path = await run_in_threadpool(memory_cacher.save_cache_stream, knowledge.file, knowledge.filename)
 
     # Create watch id
     watch_id = str(uuid.uuid4())
@@ -139,14 +165,17 @@ async def upload_knowledge_data(user: UserSchema, knowledge: UploadFile, bg_task
     })
 
     # Upload knowledge
-    bg_tasks.add_task(_upload_single_knowledge, file_content, knowledge.filename, watch_id)
+    bg_tasks.add_task(_upload_single_knowledge, cache_file_path, knowledge.filename, project_id, watch_id)
 
     return watch_id
 
 def get_upload_progress(watch_id: AnyStr):
     return memory_cacher.get(watch_id)
 
-async def download_knowledge_content(knowledge_id: AnyStr, user: UserSchema) -> bytes:
+def get_knowledge_file(knowledge_id: AnyStr, user: UserSchema) -> tuple[KnowledgeSchema, Dict]:
+    '''
+    Get the knowledge and the metadata of its file, without downloading it.
+    '''
     # Validate permission
     _validate_permissions(user)
 
@@ -158,14 +187,19 @@ async def download_knowledge_content(knowledge_id: AnyStr, user: UserSchema) ->
             detail="Knowledge not found."
         )
 
-    knowledge_content = knowledge.download_content()
-    if not knowledge_content:
+    metadata = storage_db.get_metadata(knowledge.path) if knowledge.path else None
+    if not metadata:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Knowledge content not found."
         )
 
-    return knowledge_content
+    return knowledge, metadata
+
+async def stream_knowledge_content(path: AnyStr, start: int = 0, end: int = None) -> AsyncIterator[bytes]:
+    # Chunks go from the storage to the client as they are read, off the event loop
+    async for chunk in iterate_in_threadpool(storage_db.stream(path, start, end)):
+        yield chunk
 
 def delete_knowledges_by_ids(knowledge_ids: List[AnyStr]):
     for knowledge_id in knowledge_ids:
@@ -185,12 +219,8 @@ def delete_current_knowledge(knowledge_id: AnyStr, user: UserSchema):
             detail="Knowledge not found."
         )
 
-    # Delete vectors
-    VectorEmbeddingSchema.from_query(
-        collection="project_collection",  # Cần thay đổi nếu cần
-        key="id",
-        value=knowledge_id
-    ).delete("project_collection")  # Cần thay đổi nếu cần
+    # Delete vectors, filtered on the knowledge by Qdrant
+    VectorEmbeddingSchema.delete_by_knowledge(knowledge_id)
 
     # Delete Knowledge
     knowledge.delete_knowledge()
@@ -207,8 +237,5 @@ def get_retriever(knowledge_id: AnyStr, user: UserSchema):
             detail="Knowledge not found."
         )
 
-    return VectorEmbeddingSchema.from_query(
-        collection="project_collection",  # Cần thay đổi nếu cần
-        key="id",
-        value=knowledge_id
-    ).get_retriever()
+    # Only retrieve chunks of this knowledge
+    return vector_db.get_retriever(knowledge_id=knowledge_id)
@@ -1,4 +1,4 @@
-from typing import AnyStr, Dict
+from typing import AnyStr, Dict, List
 from pydantic import BaseModel
 from fastapi import HTTPException, status
 from .user_controller import get_all_users_by_ids
@@ -11,43 +11,40 @@ def get_all_projects_by_ids(user: UserSchema, get_type: TypeGetAllProjects):
     '''
     Get all projects by the list of project ids.
     '''
-    if get_type == "owned":
-        if len(user.projects) == 0:
-            return []
+    project_ids = {
+        "owned": user.projects,
+        "shared": user.shared,
+        "deleted": user.trash,
+    }.get(get_type)
 
-        projects = ProjectSchema.find_all_by_ids(user.projects)
-
-        # Fetch member data for each project
-        for project in projects:
-            project.members = get_all_users_by_ids(project.members, user)
-
-    elif get_type == "shared":
-        if len(user.shared) == 0:
-            return []
+    if project_ids is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid get type",
+        )
 
-        projects = ProjectSchema.find_all_by_ids(user.shared)
+    if len(project_ids) == 0:
+        return []
 
-        # Fetch member data for each project
-        for project in projects:
-            project.members = get_all_users_by_ids(project.members, user)
+    projects = ProjectSchema.find_all_by_ids(project_ids)
 
-    elif get_type == "deleted":
-        if len(user.trash) == 0:
-            return []
+    # Fetch member data of all projects at once
+    attach_project_members(projects, user)
 
-        projects = ProjectSchema.find_all_by_ids(user.trash)
+    return projects
 
-        # Fetch member data for each project
-        for project in projects:
-            project.members = get_all_users_by_ids(project.members, user)
 
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid get type",
-        )
+def attach_project_members(projects: List[ProjectSchema], user: UserSchema):
+    '''
+    Replace member ids of the projects by their user data.
+    Members shared by many projects are fetched once, in a single batch.
+    '''
+    member_ids = list(dict.fromkeys(
+        member_id for project in projects for member_id in project.members or []))
+    members = {member.id: member for member in get_all_users_by_ids(member_ids, user)}
 
-    return projects
+    for project in projects:
+        project.members = [members[member_id] for member_id in project.members or [] if member_id in members]
 
 
 # Get project by project id
@@ -164,33 +161,14 @@ def update_member_project(project_id: AnyStr, data: BaseModel, user: UserSchema)
             detail="Project not found."
         )
 
-    if data.is_add:
-        # Update project in database
-        project.update_members(data.members, is_add=data.is_add)
-
-        # Iterate through members and update user in database
-        for member_id in data.members:
-            # Get user by id
-            member = UserSchema.find_by_id(member_id)
-            if not member:
-                continue
-            if project.id not in member.shared:
-                member.update_user_projects(
-                    project.id, is_add=data.is_add, key="shared")
+    # Get all members at once, unknown users are skipped
+    members = UserSchema.find_all_by_ids(data.members)
 
-    else:
-        # Iterate through members and update user in database
-        for member_id in data.members:
-            # Get user by id
-            member = UserSchema.find_by_id(member_id)
-            if not member:
-                continue
-            if project.id in member.shared:
-                member.update_user_projects(
-                    project.id, is_add=data.is_add, key="shared")
+    # Only members whose shared list changes are written
+    shared_uids = [member.id for member in members if (project.id in member.shared) != data.is_add]
 
-        # Update project in database
-        project.update_members(data.members, is_add=data.is_add)
+    # Update project and members in one batch
+    project.update_members(data.members, is_add=data.is_add, shared_uids=shared_uids)
 
 
 # Delete project
@@ -227,9 +205,8 @@ def delete_current_project(project_id: AnyStr, user: UserSchema, is_purge: bool
         # Update user in database
         user.update_user_projects(project.id, is_add=False, key="trash")
     else:
-        # Update user in database
-        user.update_user_projects(project.id, is_add=True, key="trash")
-        user.update_user_projects(project.id, is_add=False, key="projects")
+        # Move project to trash in one write
+        user.trash_projects([project.id])
 
 
 # Restore project
@@ -252,6 +229,35 @@ def restore_current_project(project_id: AnyStr, user: UserSchema):
             detail="Project not found."
         )
 
-    # Update user in database
-    user.update_user_projects(project.id, is_add=True, key="projects")
-    user.update_user_projects(project.id, is_add=False, key="trash")
\ No newline at end of file
+    # Move project out of trash in one write
+    user.restore_projects([project.id])
+
+
+# Delete many projects
+def delete_current_projects(project_ids: List[AnyStr], user: UserSchema):
+    '''
+    Move many projects to trash at once.
+    '''
+    # Check if user has access to all projects
+    if any(project_id not in user.projects for project_id in project_ids):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to all these projects."
+        )
+
+    user.trash_projects(list(dict.fromkeys(project_ids)))
+
+
+# Restore many projects
+def restore_current_projects(project_ids: List[AnyStr], user: UserSchema):
+    '''
+    Restore many projects from trash at once.
+    '''
+    # Check if all projects are in user's trash
+    if any(project_id not in user.trash for project_id in project_ids):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to all these projects."
+        )
+
+    user.restore_projects(list(dict.fromkeys(project_ids)))
\ No newline at end of file
@@ -1,14 +1,39 @@
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from typing import AnyStr
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import Runnable
+from typing import AnyStr, AsyncIterator, Dict, List, Tuple
 import re
+import time
+import asyncio
+import logging
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.output_parsers import StrOutputParser as TokenOutputParser
 from fastapi import HTTPException, status
 from ..schemas.user_schema import UserSchema
-from ..configs.llm_config import gpt_model, gemini_model
 from ..schemas.knowledge_schema import KnowledgeSchema
 from ..schemas.project_schema import ProjectSchema
-from ..providers import vector_db
+from ..providers import vector_db, answer_cacher, conversation_db, llm_router
+from ..providers.llm_provider import LLMRouterProvider
+from ..utils.constants import (
+    DEFAULT_RAG_SYSTEM_PROMPT,
+    RAG_HISTORY_SUMMARIZE,
+    RAG_FETCH_K,
+    RAG_CANDIDATE_K,
+    RAG_MMR_LAMBDA,
+    RAG_CONTEXT_TOKEN_BUDGET,
+    RAG_RERANKER,
+    RAG_BATCH_CONCURRENCY,
+)
+from ..utils.utils import count_tokens
+from ..utils.logger import prefix_color_map, should_log_sample
+from ..utils.metrics import rag_stage_latency
+from ..utils.context_packer import rerank_documents, merge_overlapping_documents, pack_documents
+
+
+logger = logging.getLogger("uvicorn.info")
+
+ANSWER_PATTERN = re.compile(r'Answer:\s*(.*)', re.DOTALL)
+ANSWER_MARKER = "Answer:"
 
 
 class StrOutputParser(StrOutputParser):
@@ -18,24 +43,47 @@ class StrOutputParser(StrOutputParser):
     def parse(self, text: str) -> str:
         return self.extract_answer(text)
 
-    def extract_answer(self, text_response: str, pattern: str = r'Answer:\s*(.*)') -> str:
-        match = re.search(pattern, text_response, re.DOTALL)
+    def extract_answer(self, text_response: str, pattern: re.Pattern = ANSWER_PATTERN) -> str:
+        match = pattern.search(text_response)
         return match.group(1).strip() if match else text_response
 
 
 class RAGController:
-    def __init__(self, llm=None) -> None:
+    def __init__(self, router: LLMRouterProvider = llm_router, summarize_history: bool = RAG_HISTORY_SUMMARIZE) -> None:
         """
-        Initialize the RAGController with a default LLM.
+        Initialize the RAGController with an LLM router.
         Parameters:
-        llm: The large language model to be used for answering questions. Default is gemini_model.
+        router: Route questions to the LLM chosen per request or per project. Default is gemini.
+        summarize_history: Summarize turns out of the history window in background.
         """
-        self.llm = llm or gemini_model  # Set default LLM to gemini
+        self.router = router
         self.str_parser = StrOutputParser()
+        # Streamed chunks are passed through, the answer is extracted once from the joined text
+        self.token_parser = TokenOutputParser()
+        self.summarize_history = summarize_history
+        self._background_tasks = set()
+        # Compiled chains by (id of the LLM, system prompt)
+        self._chains: Dict[Tuple[int, str], Tuple[object, Runnable]] = {}
 
-    def set_llm(self, llm) -> None:
-        """Set the LLM for answering questions."""
-        self.llm = llm
+    def set_project_llm(self, project_id: AnyStr, llm_name: AnyStr, user: UserSchema) -> None:
+        """Set the default LLM of a project, other projects are not affected."""
+        if llm_name not in self.router.models:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid LLM name"
+            )
+        if project_id not in user.projects:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this project."
+            )
+        project = ProjectSchema.find_by_id(project_id)
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found."
+            )
+        project.update_project({"llm": llm_name})
 
     def _validate_permission(self, project_id: AnyStr, user: UserSchema):
         """Validate project ID against user's permissions."""
@@ -54,11 +102,16 @@ class RAGController:
         return project
 
     def create_information_extractor_prompt(self, user_system_message: str) -> ChatPromptTemplate:
-        """Create a prompt template for information extraction."""
+        """
+        Create a prompt template for information extraction.
+        The system message is static and comes first, so the prompt starts with the same prefix
+        on every call and provider-side prompt caching can apply. Per-request parts come last.
+        """
         return ChatPromptTemplate(
             [
-                SystemMessagePromptTemplate(user_system_message),
-                HumanMessagePromptTemplate("Question: {question}. Context: {context}")
+                SystemMessage(content=user_system_message),
+                HumanMessagePromptTemplate.from_template(
+                    "Context: {context}\n\nPrevious conversation:\n{history}\n\nQuestion: {question}")
             ]
         )
 
@@ -66,7 +119,193 @@ class RAGController:
         """Format retrieved documents for the prompt."""
         return "\n".join(doc.page_content for doc in documents)
 
-    async def get_response(self, question: str, document_id: str, current_user: UserSchema):
+    def get_message_history(self, user_id: AnyStr, document_id: AnyStr) -> str:
+        """Get the summary and latest turns of the user on the document, within the token budget."""
+        return conversation_db.format_history(user_id, document_id)
+
+    def _append_message_history(self, user_id: AnyStr, document_id: AnyStr, question: str, answer: str) -> bool:
+        """Append the pair, return whether turns are out of the window."""
+        conversation_db.append(user_id, document_id, question, answer)
+        return self.summarize_history and conversation_db.has_overflow(user_id, document_id)
+
+    async def save_message_history(self, user_id: AnyStr, document_id: AnyStr, question: str, answer: str) -> None:
+        """
+        Append a (question, answer) pair to the history of the user on the document.
+        The conversation store is called in a worker thread, off the event loop.
+        """
+        overflow = await asyncio.to_thread(self._append_message_history, user_id, document_id, question, answer)
+
+        # Fold turns out of the window into the summary, without blocking the response
+        if overflow:
+            task = asyncio.create_task(self._summarize_history(user_id, document_id))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def _summarize_history(self, user_id: AnyStr, document_id: AnyStr) -> None:
+        try:
+            await conversation_db.summarize(user_id, document_id, self._summarize_turns)
+        except Exception as e:
+            logger.warning(f"Failed to summarize conversation history. {str(e)}")
+
+    async def _summarize_turns(self, summary: str, turns: List[Dict]) -> str:
+        """Summarize the previous summary and older turns with the LLM."""
+        conversation = "\n".join(f"Q: {turn['q']} A: {turn['a']}" for turn in turns)
+        message = await self.router.get_model().ainvoke(
+            "Summarize the conversation below in a few sentences, keeping facts the user asked about.\n"
+            f"Previous summary: {summary}\n{conversation}",
+            config=self.router.get_config(self.router.get_provider()),
+        )
+        return message.content
+
+    def _get_document(self, document_id: AnyStr, user: UserSchema, llm_name: AnyStr = None):
+        """
+        Fetch the knowledge document and validate permission on its project.
+        Return the document and the LLM provider, requested or set on the project.
+        """
+        document_data = KnowledgeSchema.find_by_id(document_id)
+        if not document_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Knowledge not found."
+            )
+        # Knowledge outside of any project is not readable by anyone
+        if not document_data.project_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to access this knowledge."
+            )
+        project = self._validate_permission(document_data.project_id, user)
+        return document_data, self.router.get_provider(llm_name or project.llm)
+
+    def _get_metadata(self, knowledge: KnowledgeSchema, user: UserSchema) -> Dict[str, str]:
+        """Label the LLM calls of a request with its project and user."""
+        return {"project_id": knowledge.project_id, "user_id": user.id}
+
+    def _build_chain(self, llm, system_prompt: str = DEFAULT_RAG_SYSTEM_PROMPT, stream: bool = False) -> Runnable:
+        """
+        Get the answering chain of the LLM and system prompt, compiled once and reused.
+        The context is retrieved beforehand.
+        Streaming chains output the raw tokens, the answer parser would run on every chunk.
+        """
+        key = (id(llm), system_prompt, stream)
+        cached = self._chains.get(key)
+        # The LLM is kept with its chain, so a reused id never matches another model
+        if cached is None or cached[0] is not llm:
+            parser = self.token_parser if stream else self.str_parser
+            chain = self.create_information_extractor_prompt(system_prompt) | llm | parser
+            cached = self._chains[key] = (llm, chain)
+        return cached[1]
+
+    def _build_stream_chain(self, llm, system_prompt: str = DEFAULT_RAG_SYSTEM_PROMPT) -> Runnable:
+        return self._build_chain(llm, system_prompt, stream=True)
+
+    @staticmethod
+    async def _stream_answer(tokens: AsyncIterator[str], chunks: List[str]) -> AsyncIterator[str]:
+        """
+        Hold the tokens back until the answer marker, then stream the answer only.
+        All tokens are collected in chunks. Without a marker, the whole text is sent at the end.
+        """
+        answering, started = False, False
+        async for token in tokens:
+            chunks.append(token)
+            if not answering:
+                text = "".join(chunks)
+                if ANSWER_MARKER not in text:
+                    continue
+                answering, token = True, text.split(ANSWER_MARKER, 1)[1]
+
+            # Whitespace after the marker is not part of the answer
+            if not started:
+                token = token.lstrip()
+                started = token != ""
+            if token:
+                yield token
+
+        if not answering and chunks:
+            yield "".join(chunks)
+
+    def _build_inputs(self, question: str, documents, history: str) -> Dict[str, str]:
+        """Build the chain inputs with the user's history as context."""
+        return {
+            "question": question,
+            "context": self.format_docs(documents),
+            "history": history,
+        }
+
+    async def _retrieve_batch(self, questions: List[str], document_id: AnyStr):
+        """
+        Embed the questions and assemble the context of each from the chunks of the document:
+        over-fetch candidates, rerank them, pack them into the token budget
+        and merge adjacent overlapping chunks.
+        All questions are embedded in one batch and searched in one request.
+        """
+        if len(questions) == 1:
+            vectors = [await vector_db.embedder.aembed_query(questions[0])]
+        else:
+            vectors = await vector_db.embedder.aembed_documents(questions)
+
+        if RAG_RERANKER == "mmr":
+            candidates = await vector_db.max_marginal_relevance_search_batch_by_vector(
+                vectors, k=RAG_CANDIDATE_K, fetch_k=RAG_FETCH_K, lambda_mult=RAG_MMR_LAMBDA, knowledge_id=document_id)
+        else:
+            candidates = await vector_db.similarity_search_batch_by_vector(
+                vectors, k=RAG_FETCH_K, knowledge_id=document_id)
+            if RAG_RERANKER == "cross-encoder":
+                candidates = await asyncio.gather(*[
+                    asyncio.to_thread(rerank_documents, question, documents, RAG_CANDIDATE_K)
+                    for question, documents in zip(questions, candidates)
+                ])
+            else:
+                candidates = [documents[:RAG_CANDIDATE_K] for documents in candidates]
+
+        contexts = [
+            merge_overlapping_documents(pack_documents(documents, RAG_CONTEXT_TOKEN_BUDGET))
+            for documents in candidates
+        ]
+        return vectors, contexts
+
+    async def _retrieve(self, question: str, document_id: AnyStr):
+        """Embed the question and assemble its context from the chunks of the document."""
+        vectors, contexts = await self._retrieve_batch([question], document_id)
+        return vectors[0], contexts[0]
+
+    async def _timed(self, stage: str, timings: Dict[str, float], awaitable):
+        """Await a stage and record its duration."""
+        _s = time.perf_counter()
+        try:
+            return awaitable
+        finally:
+            timings[stage] = time.perf_counter() - _s
+
+    async def _prepare(self, question: str, document_id: AnyStr, user: UserSchema, llm_name: AnyStr = None):
+        """
+        Run the independent stages before the LLM concurrently:
+        permission check, history load and query embedding with retrieval.
+        Pre-LLM latency is the slowest stage instead of their sum.
+        """
+        timings = {}
+        _s = time.perf_counter()
+        (knowledge, provider), history, (vector, documents) = await asyncio.gather(
+            self._timed("permission", timings, asyncio.to_thread(
+                self._get_document, document_id, user, llm_name)),
+            self._timed("history", timings, asyncio.to_thread(
+                self.get_message_history, user.id, document_id)),
+            self._timed("retrieval", timings, self._retrieve(question, document_id)),
+        )
+        timings["prepare"] = time.perf_counter() - _s
+
+        for stage, duration in timings.items():
+            rag_stage_latency.labels(stage).observe(duration)
+        if should_log_sample():
+            logger.debug(f"{prefix_color_map('LLM')} (rag) stages " + " ".join(
+                f"{stage}=[{duration:.2f}s]" for stage, duration in timings.items()))
+        return provider, history, vector, documents, timings, self._get_metadata(knowledge, user)
+
+    def _count_tokens(self, inputs: Dict[str, str], answers: str) -> int:
+        """Estimate the tokens spent by one LLM call."""
+        return count_tokens(DEFAULT_RAG_SYSTEM_PROMPT + "".join(inputs.values()) + answers)
+
+    async def get_response(self, question: str, document_id: str, current_user: UserSchema, llm_name: str = None):
         """
         Asynchronously get answers to a question based on a document, ensuring permission.
         
@@ -74,42 +313,134 @@ class RAGController:
         - question: The user's question.
         - document_id: The ID of the document for context.
         - current_user: The user asking the question (for validation).
+        - llm_name: The LLM to answer with, default to the project's LLM.
 
         Returns:
-        - dict: Contains the original question and extracted answers.
+        - dict: Contains the original question, extracted answers and stage timings.
         """
-        # Fetch knowledge document and validate permission
-        document_data = KnowledgeSchema.find_by_id(document_id)
-        self._validate_permission(document_data.project_id, current_user)
-
-        # Load the vector database collection
-        await vector_db.load_collection
-
-        # Retrieve previous messages from Redis
-        message_history = self.get_message_history(current_user.user_id)
+        provider, history, vector, documents, timings, metadata = await self._prepare(
+            question, document_id, current_user, llm_name)
 
-        # Format the message history for context
-        context = "\n".join([f"Q: {q} A: {a}" for q, a in message_history.items()])
+        # Reuse the answer of a similar question on the same chunks
+        model_name = self.router.get_model_name(provider)
+        chunk_ids = [doc.metadata["_id"] for doc in documents]
+        answers = answer_cacher.get(document_id, model_name, chunk_ids, vector, history=history)
 
-        # Set up retriever and chain for question answering
-        retriever = vector_db.create_retriever()
-        prompt_template = self.create_information_extractor_prompt("System message here")  # Define system message as needed
-
-        # Modify prompt to include the context
-        human_prompt = f"Previous context:\n{context}\n\nQuestion: {question}. Context: {self.format_docs(retriever.retrieve(document_data))}"
-        formatted_prompt = HumanMessagePromptTemplate(human_prompt)
-
-        chain = prompt_template | self.llm | self.str_parser
-        rag_chain = {"context": retriever | self.format_docs, "question": RunnablePassthrough()} | chain
-
-        # Get answers asynchronously
-        answers = await rag_chain.invoke(question)
+        if answers is None:
+            # Get answers asynchronously, hedged to the backup LLM when slow
+            inputs = self._build_inputs(question, documents, history)
+            provider, answers = await self._timed(
+                "llm", timings, self.router.ainvoke(self._build_chain, inputs, provider, metadata=metadata))
+            answer_cacher.set(document_id, self.router.get_model_name(provider), chunk_ids, vector,
+                              answers, tokens=self._count_tokens(inputs, answers), history=history)
 
         # Save the question and answer to message history
-        self.save_message_history(current_user.user_id, question, answers)
+        await self.save_message_history(current_user.id, document_id, question, answers)
 
         return {
             "question": question,
             "answers": answers,
+            "timings": timings,
         }
 
+    async def stream_response(self, question: str, document_id: str, current_user: UserSchema, llm_name: str = None) -> AsyncIterator[str]:
+        """
+        Stream answer tokens of a question as they are generated.
+        Permission is validated before the stream starts, the full answer is saved to history at the end.
+
+        Parameters:
+        - question: The user's question.
+        - document_id: The ID of the document for context.
+        - current_user: The user asking the question (for validation).
+        - llm_name: The LLM to answer with, default to the project's LLM.
+
+        Returns:
+        - AsyncIterator[str]: The answer tokens.
+        """
+        provider, history, vector, documents, _, metadata = await self._prepare(
+            question, document_id, current_user, llm_name)
+
+        chunk_ids = [doc.metadata["_id"] for doc in documents]
+        cached_answers = answer_cacher.get(
+            document_id, self.router.get_model_name(provider), chunk_ids, vector, history=history)
+        inputs = self._build_inputs(question, documents, history)
+
+        async def _stream():
+            # A cached answer is sent as a single chunk
+            if cached_answers is not None:
+                yield cached_answers
+                await self.save_message_history(current_user.id, document_id, question, cached_answers)
+                return
+
+            # Fallback to the backup LLM when the first token does not come
+            answered_by, tokens = await self.router.astream(self._build_stream_chain, inputs, provider, metadata=metadata)
+            chunks = []
+            async for token in self._stream_answer(tokens, chunks):
+                yield token
+
+            # Save the question and answer to cache and message history
+            answers = self.str_parser.extract_answer("".join(chunks))
+            answer_cacher.set(document_id, self.router.get_model_name(answered_by), chunk_ids, vector,
+                              answers, tokens=self._count_tokens(inputs, answers), history=history)
+            await self.save_message_history(current_user.id, document_id, question, answers)
+
+        return _stream()
+
+    async def stream_batch_response(
+        self,
+        questions: List[str],
+        document_id: str,
+        current_user: UserSchema,
+        llm_name: str = None,
+        concurrency: int = RAG_BATCH_CONCURRENCY,
+    ) -> AsyncIterator[Dict]:
+        """
+        Answer many questions on a document, streaming each result as soon as it completes.
+        Questions are embedded and searched in one batch, LLM calls run with bounded concurrency.
+        Batch answers are not saved to the message history.
+
+        Parameters:
+        - questions: The user's questions.
+        - document_id: The ID of the document for context.
+        - current_user: The user asking the questions (for validation).
+        - llm_name: The LLM to answer with, default to the project's LLM.
+        - concurrency: The maximum number of concurrent LLM calls of the batch.
+
+        Returns:
+        - AsyncIterator[dict]: Contains the index, question and answers (or error) of each question.
+        """
+        (knowledge, provider), (vectors, contexts) = await asyncio.gather(
+            asyncio.to_thread(self._get_document, document_id, current_user, llm_name),
+            self._retrieve_batch(questions, document_id),
+        )
+        metadata = self._get_metadata(knowledge, current_user)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _answer(index: int) -> Dict:
+            question, documents = questions[index], contexts[index]
+            chunk_ids = [doc.metadata["_id"] for doc in documents]
+            try:
+                answers = answer_cacher.get(
+                    document_id, self.router.get_model_name(provider), chunk_ids, vectors[index])
+                if answers is None:
+                    inputs = self._build_inputs(question, documents, "")
+                    async with semaphore:
+                        answered_by, answers = await self.router.ainvoke(
+                            self._build_chain, inputs, provider, metadata=metadata)
+                    answer_cacher.set(document_id, self.router.get_model_name(answered_by), chunk_ids, vectors[index],
+                                      answers, tokens=self._count_tokens(inputs, answers))
+                return {"index": index, "question": question, "answers": answers}
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                return {"index": index, "question": question, "error": detail}
+
+        async def _stream():
+            tasks = [asyncio.create_task(_answer(index)) for index in range(len(questions))]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return _stream()
@@ -11,4 +11,5 @@ class LoginResponseInterface(BaseModel):
 
 
 class AuthInterface(BaseModel):
-    gtoken: str = Field(..., title="Google Access-Token")
\ No newline at end of file
+    gtoken: str = Field(None, title="Google Access-Token")
+    id_token: str = Field(None, title="Google ID-Token, verified offline")
\ No newline at end of file
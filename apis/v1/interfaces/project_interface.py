@@ -32,6 +32,10 @@ class UpdateLastOpenedProjectInterface(BaseModel):
     last_opened: str = Field(..., title="Last Opened Time")
 
 
+class ProjectIdsInterface(BaseModel):
+    project_ids: list[str] = Field(..., title="Project IDs")
+
+
 class UpdateMemberProjectInterface(BaseModel):
     members: list[str] = Field(..., title="Project Members")
     is_add: bool = Field(True, title="Add or Remove Member")
\ No newline at end of file
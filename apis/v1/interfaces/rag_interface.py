@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from ..utils.constants import RAG_BATCH_MAX_QUESTIONS
+
+
+class AskBatchInterface(BaseModel):
+    document_id: str = Field(..., title="Knowledge ID")
+    questions: list[str] = Field(..., title="Questions", min_length=1, max_length=RAG_BATCH_MAX_QUESTIONS)
+    llm_name: str = Field(None, title="LLM Name")
@@ -1,9 +1,9 @@
 from typing import Annotated
-import datetime
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from ..schemas.user_schema import UserSchema
-from ..providers.jwt_provider import jwt
+from ..providers import jwt, auth_cacher
 
 security = HTTPBearer()
 
@@ -20,9 +20,27 @@ def get_current_user(credentials: Annotated[HTTPAuthorizationCredentials, Depend
             detail="Authorization Token is required",
         )
 
-    # Use decode instead of decrypt to get user data.
+    # Tokens verified recently skip decryption
+    data = auth_cacher.get(token)
+    if data is None:
+        data = _decrypt_token(token)
+
+    # Get user data, always fresh so revoked projects are not accessible
+    user = UserSchema.find_by_id(data.get("id"))
+
+    # If user is not found, return Un-authorized.
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+
+    return user
+
+def _decrypt_token(token: str):
+    # Decrypt token to get user data.
     try:
-        data = jwt.decode(token)
+        data = jwt.decrypt(token)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,25 +54,15 @@ def get_current_user(credentials: Annotated[HTTPAuthorizationCredentials, Depend
             detail="Invalid Token",
         )
 
-    # Get user Id, Expiration time in token
-    uid = data.get("id")
+    # Get Expiration time in token
     exp = data.get("exp")
 
     # Check if token is expired
-    if exp is None or datetime.datetime.fromtimestamp(exp, tz=datetime.timezone.utc) < datetime.datetime.now(tz=datetime.timezone.utc):
+    if exp is None or exp < time.time():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Expired Token",
         )
 
-    # Get user data
-    user = UserSchema.find_by_id(uid)
-
-    # If user is not found, return Un-authorized.
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
-
-    return user
+    auth_cacher.set(token, data)
+    return data
@@ -1,23 +1,41 @@
 from .memory_provider import MemoryProvider
-# from .word_embedding_provider import WordEmbeddingProvider
+from .answer_cache_provider import AnswerCacheProvider
+from .auth_cache_provider import AuthCacheProvider
+from .word_embedding_provider import WordEmbeddingProvider
 from .vectordb_provider import VectorDatabaseProvider
 from .storage_provider import StorageProvider
 from .db_provider import DatabaseProvider
+from .conversation_provider import conversation_db
 from .jwt_provider import JWTProvider
+from .google_auth_provider import GoogleAuthProvider
+from .llm_provider import LLMRouterProvider
+from .llm_metrics_provider import LLMMetricsProvider
+from ..configs.llm_config import gpt_model, gemini_model
 from ..utils.constants import (
 USER_COLLECTION,
 KNOWLEDGE_STORAGE,
 KNOWLEDGE_COLLECTION,
-PROJECT_COLLECTION
+PROJECT_COLLECTION,
+KNOWLEDGE_VECTOR_COLLECTION
 )
 
 
 
 # Define Providers
 memory_cacher = MemoryProvider()
+answer_cacher = AnswerCacheProvider()
+auth_cacher = AuthCacheProvider()
+llm_metrics = LLMMetricsProvider()
+llm_router = LLMRouterProvider(models={
+    "gemini": gemini_model,
+    "gpt": gpt_model,
+}, callbacks=[llm_metrics])
 jwt = JWTProvider()
+google_auth = GoogleAuthProvider()
 user_db = DatabaseProvider(collection_name=USER_COLLECTION)
 project_db = DatabaseProvider(collection_name=PROJECT_COLLECTION)
 knowledge_db = DatabaseProvider(collection_name=KNOWLEDGE_COLLECTION)
 storage_db = StorageProvider(directory=KNOWLEDGE_STORAGE)
-vector_db = VectorDatabaseProvider(collection_name="KNOWLEDGE")
+word_embedding_provider = WordEmbeddingProvider()
+vector_db = VectorDatabaseProvider(
+    collection_name=KNOWLEDGE_VECTOR_COLLECTION, embedding=word_embedding_provider)
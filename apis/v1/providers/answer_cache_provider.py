@@ -0,0 +1,126 @@
+from typing import AnyStr, Dict, List
+import time
+import hashlib
+import threading
+import numpy as np
+from ..utils.metrics import rag_answer_cache_hits, rag_answer_cache_misses, rag_answer_cache_saved_tokens
+from ..utils.constants import (
+    RAG_CACHE_SIMILARITY_THRESHOLD,
+    RAG_CACHE_MAX_ENTRIES,
+    RAG_CACHE_EXPIRATION,
+)
+
+
+class AnswerCacheProvider:
+    '''
+    Semantic cache of RAG answers.
+    Answers are keyed by document, LLM name, retrieved chunk ids and conversation history,
+    and matched by the cosine similarity of the question embeddings.
+    Hits, misses and saved tokens are exported as Prometheus counters.
+    '''
+
+    def __init__(
+        self,
+        threshold: float = RAG_CACHE_SIMILARITY_THRESHOLD,
+        max_entries: int = RAG_CACHE_MAX_ENTRIES,
+        expiration: int = RAG_CACHE_EXPIRATION,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.expiration = expiration
+        # {document_id: {key: [entry]}}
+        self.entries: Dict[AnyStr, Dict[AnyStr, List[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_key(llm_name: AnyStr, chunk_ids: List, history: AnyStr = "") -> AnyStr:
+        # Format: {llm_name}:{sorted chunk ids}:{history digest}
+        # The same question answers differently in another conversation
+        history_digest = hashlib.sha256(history.encode()).hexdigest()[:16] if history else ""
+        return f"{llm_name}:{','.join(sorted(str(_id) for _id in chunk_ids))}:{history_digest}"
+
+    @staticmethod
+    def _normalize(vector: List[float] | np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm != 0 else vector
+
+    def get(self, document_id: AnyStr, llm_name: AnyStr, chunk_ids: List, vector: List[float], history: AnyStr = "") -> AnyStr | None:
+        '''
+        Get the cached answer of the most similar question above the threshold.
+        Return None on a miss.
+        '''
+        key = self._get_key(llm_name, chunk_ids, history)
+        vector = self._normalize(vector)
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = self.entries.get(document_id, {}).get(key, [])
+            best_score, best_entry = self.threshold, None
+            for entry in candidates:
+                if now - entry["created_at"] > self.expiration:
+                    continue
+                score = float(np.dot(entry["vector"], vector))
+                if score >= best_score:
+                    best_score, best_entry = score, entry
+
+        if best_entry is None:
+            rag_answer_cache_misses.inc()
+            return None
+
+        rag_answer_cache_hits.inc()
+        rag_answer_cache_saved_tokens.inc(best_entry["tokens"])
+        return best_entry["answer"]
+
+    def set(
+        self,
+        document_id: AnyStr,
+        llm_name: AnyStr,
+        chunk_ids: List,
+        vector: List[float],
+        answer: AnyStr,
+        tokens: int = 0,
+        history: AnyStr = "",
+    ) -> None:
+        '''
+        Cache the answer. Expired and oldest entries of the document are evicted.
+        '''
+        key = self._get_key(llm_name, chunk_ids, history)
+        now = time.monotonic()
+
+        with self._lock:
+            document_entries = self.entries.setdefault(document_id, {})
+            document_entries.setdefault(key, []).append({
+                "vector": self._normalize(vector),
+                "answer": answer,
+                "tokens": tokens,
+                "created_at": now,
+            })
+
+            # Evict expired entries, then the oldest ones above the limit
+            alive = sorted(
+                ((entry["created_at"], _key, entry)
+                 for _key, _entries in document_entries.items()
+                 for entry in _entries
+                 if now - entry["created_at"] <= self.expiration),
+                key=lambda item: item[0],
+            )[-self.max_entries:]
+            document_entries.clear()
+            for _, _key, entry in alive:
+                document_entries.setdefault(_key, []).append(entry)
+
+    def invalidate(self, document_id: AnyStr) -> None:
+        '''
+        Remove all cached answers of a document.
+        '''
+        with self._lock:
+            self.entries.pop(document_id, None)
+
+    def invalidates(self, document_ids: List[AnyStr]) -> None:
+        with self._lock:
+            for document_id in document_ids:
+                self.entries.pop(document_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries = {}
@@ -0,0 +1,66 @@
+from typing import AnyStr, Dict, Tuple
+import time
+import hashlib
+import threading
+from ..utils.constants import AUTH_CACHE_EXPIRATION, AUTH_CACHE_MAX_ENTRIES
+
+
+class AuthCacheProvider:
+    '''
+    Cache of verified tokens.
+    Hold the decoded claims by token hash, until the token expires or the cache expiration,
+    whichever comes first. Users are not cached here: they are read through the database
+    cacher, which is shared by all workers, so permission changes apply right away.
+    '''
+
+    def __init__(self, expiration: int = AUTH_CACHE_EXPIRATION, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.expiration = expiration
+        self.max_entries = max_entries
+        # {token hash: (expires_at, claims)}
+        self.entries: Dict[AnyStr, Tuple[float, Dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_key(token: AnyStr) -> AnyStr:
+        # Raw tokens are never kept in memory
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: AnyStr) -> Dict | None:
+        '''
+        Get the claims of a verified token.
+        Return None when the token is unknown or expired.
+        '''
+        key = self._get_key(token)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self.remove(key)
+            return None
+        return entry[1]
+
+    def set(self, token: AnyStr, claims: Dict) -> None:
+        key = self._get_key(token)
+        expires_at = min(claims.get("exp", 0), time.time() + self.expiration)
+
+        with self._lock:
+            if len(self.entries) >= self.max_entries:
+                self._evict()
+            self.entries[key] = (expires_at, claims)
+
+    def remove(self, key: AnyStr) -> None:
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries = {}
+
+    def _evict(self) -> None:
+        # Remove expired tokens, then the oldest ones when still full
+        now = time.time()
+        for key in [key for key, entry in self.entries.items() if entry[0] <= now]:
+            self.entries.pop(key, None)
+        overflow = len(self.entries) - self.max_entries + 1
+        for key in list(self.entries.keys())[:max(overflow, 0)]:
+            self.entries.pop(key, None)
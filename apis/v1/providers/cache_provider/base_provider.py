@@ -1,5 +1,6 @@
 from typing import Any
 from abc import abstractmethod
+from ...utils.utils import apply_array_delta
 
 
 class BaseCacheProvider:
@@ -49,6 +50,33 @@ class BaseCacheProvider:
         """
         raise NotImplementedError
 
+    def update_array(self, key: str, field: str, values: list, is_add: bool) -> None:
+        """
+        Add or remove values of an array field of a cached dict. Nothing is cached on a miss.
+        """
+        self.update_arrays([key], field, values, is_add)
+
+    def update_arrays(self, keys: list[str], field: str, values: list, is_add: bool) -> None:
+        """
+        Add or remove values of an array field of many cached dicts.
+        """
+        data = {}
+        for key, value in zip(keys, self.gets(keys)):
+            if value:
+                value[field] = apply_array_delta(value.get(field), values, is_add)
+                data[key] = value
+        if len(data) != 0:
+            self.sets(data)
+
+    def increment(self, key: str, field: str, amount: int | float = 1) -> None:
+        """
+        Increment a numeric field of a cached dict. Nothing is cached on a miss.
+        """
+        value = self.get(key)
+        if value:
+            value[field] = (value.get(field) or 0) + amount
+            self.set(key, value)
+
     @abstractmethod
     def clear(self) -> None:
         """
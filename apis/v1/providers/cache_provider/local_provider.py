@@ -4,6 +4,7 @@ import os
 import orjson
 from threading import Timer
 from .base_provider import BaseCacheProvider
+from ...utils.utils import apply_array_delta
 
 
 class LocalCacheProvider(BaseCacheProvider):
@@ -83,6 +84,22 @@ class LocalCacheProvider(BaseCacheProvider):
             self.cache.pop(key, None)
         self.__save()
 
+    @override
+    def update_arrays(self, keys, field, values, is_add):
+        # Apply the delta in place, expiration timers are kept
+        for key in keys:
+            value = self.cache.get(key)
+            if value:
+                value[field] = apply_array_delta(value.get(field), values, is_add)
+        self.__save()
+
+    @override
+    def increment(self, key, field, amount=1):
+        value = self.cache.get(key)
+        if value:
+            value[field] = (value.get(field) or 0) + amount
+            self.__save()
+
     @override
     def clear(self):
         self.cache = {}
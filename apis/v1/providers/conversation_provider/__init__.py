@@ -0,0 +1,28 @@
+from typing import Type
+import os
+import importlib
+import logging
+from .base_provider import BaseConversationProvider
+
+
+logger = logging.getLogger("uvicorn.info")
+
+# Define Conversation Provider alias, follow the cache provider by default
+provider_name = os.environ.get(
+    'CONVERSATION_PROVIDER', os.environ.get('CACHE_PROVIDER', 'local'))
+logger.info(f"Using `{provider_name}` as conversation provider")
+
+# Import the conversation provider based on the provider name
+provider_module = importlib.import_module(
+    f'.{provider_name}_provider', __package__)
+ConversationProvider: Type[BaseConversationProvider] = getattr(
+    provider_module, f'{provider_name.capitalize()}ConversationProvider')
+
+# Intialized Conversation Provider, fallback to local when the backend is unreachable
+try:
+    conversation_db = ConversationProvider()
+except Exception as e:
+    logger.warning(
+        f"`{provider_name}` conversation provider is unavailable, fallback to `local`. {str(e)}")
+    from .local_provider import LocalConversationProvider
+    conversation_db = LocalConversationProvider()
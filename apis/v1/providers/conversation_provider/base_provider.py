@@ -0,0 +1,143 @@
+from typing import AnyStr, Awaitable, Callable, Dict, List, Tuple
+from abc import abstractmethod
+from ...utils.utils import count_tokens
+
+
+class BaseConversationProvider:
+    '''
+    Provide a bounded conversation memory keyed by (user, document).
+    Args:
+        max_turns: The maximum number of turns kept in storage.
+        token_budget: The maximum number of tokens of turns put in a prompt.
+        expiration: The expiration of a conversation in seconds.
+
+    Methods:
+        append: Append a question and answer turn to the conversation.
+        get_window: Get the summary and the latest turns fitting the token budget.
+        format_history: Format the window as prompt context.
+        summarize: Fold the turns out of the window into the summary.
+        clear: Remove the conversation.
+    '''
+
+    def __init__(self, max_turns: int, token_budget: int, expiration: int):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.expiration = expiration
+
+    def get_key(self, user_id: AnyStr, document_id: AnyStr) -> AnyStr:
+        """
+        Get conversation key. Format: conversation:{user_id}:{document_id}
+        """
+        return f"conversation:{user_id}:{document_id}"
+
+    @abstractmethod
+    def _push(self, key: AnyStr, turn: Dict) -> None:
+        """
+        Append a turn and keep only the last `max_turns` turns.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _range(self, key: AnyStr) -> List[Dict]:
+        """
+        Get all turns, oldest first.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _drop_oldest(self, key: AnyStr, count: int) -> None:
+        """
+        Remove the `count` oldest turns.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _get_summary(self, key: AnyStr) -> AnyStr:
+        """
+        Get the summary of the removed turns.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _set_summary(self, key: AnyStr, summary: AnyStr) -> None:
+        """
+        Set the summary of the removed turns.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _delete(self, key: AnyStr) -> None:
+        """
+        Delete the turns and summary.
+        """
+        raise NotImplementedError
+
+    def append(self, user_id: AnyStr, document_id: AnyStr, question: AnyStr, answer: AnyStr) -> None:
+        self._push(self.get_key(user_id, document_id), {
+            "q": question,
+            "a": answer,
+            "tokens": count_tokens(f"Q: {question} A: {answer}"),
+        })
+
+    def _split_window(self, turns: List[Dict], token_budget: int) -> int:
+        # Index of the first turn fitting in the budget, walking from the newest
+        used = 0
+        start = len(turns)
+        for i in range(len(turns) - 1, -1, -1):
+            used += turns[i]["tokens"]
+            if used > token_budget:
+                break
+            start = i
+        return start
+
+    def get_window(self, user_id: AnyStr, document_id: AnyStr, token_budget: int = None) -> Tuple[AnyStr, List[Dict]]:
+        """
+        Get the summary and the latest turns fitting in the token budget, oldest first.
+        """
+        key = self.get_key(user_id, document_id)
+        turns = self._range(key)
+        start = self._split_window(turns, token_budget or self.token_budget)
+        return self._get_summary(key), turns[start:]
+
+    def get_turns(self, user_id: AnyStr, document_id: AnyStr) -> List[Tuple[AnyStr, AnyStr]]:
+        """
+        Get all stored (question, answer) pairs, oldest first.
+        """
+        return [(turn["q"], turn["a"]) for turn in self._range(self.get_key(user_id, document_id))]
+
+    def format_history(self, user_id: AnyStr, document_id: AnyStr, token_budget: int = None) -> AnyStr:
+        summary, turns = self.get_window(user_id, document_id, token_budget)
+        lines = [f"Summary: {summary}"] if summary else []
+        lines.extend(f"Q: {turn['q']} A: {turn['a']}" for turn in turns)
+        return "\n".join(lines)
+
+    def has_overflow(self, user_id: AnyStr, document_id: AnyStr, token_budget: int = None) -> bool:
+        """
+        Check if some turns are out of the window and could be summarized.
+        """
+        turns = self._range(self.get_key(user_id, document_id))
+        return self._split_window(turns, token_budget or self.token_budget) > 0
+
+    async def summarize(
+        self,
+        user_id: AnyStr,
+        document_id: AnyStr,
+        summarizer: Callable[[AnyStr, List[Dict]], Awaitable[AnyStr]],
+        token_budget: int = None,
+    ) -> None:
+        """
+        Fold the turns out of the window into the summary, then drop them.
+        Turns appended meanwhile are kept since only the oldest turns are dropped.
+        """
+        key = self.get_key(user_id, document_id)
+        turns = self._range(key)
+        start = self._split_window(turns, token_budget or self.token_budget)
+        if start == 0:
+            return
+
+        summary = await summarizer(self._get_summary(key), turns[:start])
+        self._set_summary(key, summary)
+        self._drop_oldest(key, start)
+
+    def clear(self, user_id: AnyStr, document_id: AnyStr) -> None:
+        self._delete(self.get_key(user_id, document_id))
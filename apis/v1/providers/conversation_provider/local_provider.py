@@ -0,0 +1,71 @@
+from typing import AnyStr
+from typing_extensions import override
+import threading
+from threading import Timer
+from .base_provider import BaseConversationProvider
+from ...utils.constants import (
+    RAG_HISTORY_MAX_TURNS,
+    RAG_HISTORY_TOKEN_BUDGET,
+    RAG_HISTORY_EXPIRATION,
+)
+
+
+class LocalConversationProvider(BaseConversationProvider):
+    def __init__(
+        self,
+        max_turns: int = RAG_HISTORY_MAX_TURNS,
+        token_budget: int = RAG_HISTORY_TOKEN_BUDGET,
+        expiration: int = RAG_HISTORY_EXPIRATION,
+    ):
+        super().__init__(max_turns, token_budget, expiration)
+        self.turns = {}
+        self.summaries = {}
+        self.timers = {}
+        self._lock = threading.Lock()
+
+    def _touch(self, key: AnyStr) -> None:
+        # Reset expiration timer of the conversation
+        if not self.expiration:
+            return
+        if key in self.timers:
+            self.timers[key].cancel()
+        timer = Timer(self.expiration, self._delete, [key])
+        timer.daemon = True
+        timer.start()
+        self.timers[key] = timer
+
+    @override
+    def _push(self, key, turn):
+        with self._lock:
+            turns = self.turns.setdefault(key, [])
+            turns.append(turn)
+            del turns[:-self.max_turns]
+            self._touch(key)
+
+    @override
+    def _range(self, key):
+        with self._lock:
+            return list(self.turns.get(key, []))
+
+    @override
+    def _drop_oldest(self, key, count):
+        with self._lock:
+            del self.turns.get(key, [])[:count]
+
+    @override
+    def _get_summary(self, key):
+        return self.summaries.get(key, "")
+
+    @override
+    def _set_summary(self, key, summary):
+        with self._lock:
+            self.summaries[key] = summary
+
+    @override
+    def _delete(self, key):
+        with self._lock:
+            self.turns.pop(key, None)
+            self.summaries.pop(key, None)
+            timer = self.timers.pop(key, None)
+        if timer:
+            timer.cancel()
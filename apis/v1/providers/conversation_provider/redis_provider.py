@@ -0,0 +1,55 @@
+from typing_extensions import override
+import orjson
+from .base_provider import BaseConversationProvider
+from ...configs.redis_config import cache_db
+from ...utils.constants import (
+    RAG_HISTORY_MAX_TURNS,
+    RAG_HISTORY_TOKEN_BUDGET,
+    RAG_HISTORY_EXPIRATION,
+)
+
+
+class RedisConversationProvider(BaseConversationProvider):
+    '''
+    Store each conversation as a Redis list of turns, with the summary next to it.
+    '''
+
+    def __init__(
+        self,
+        max_turns: int = RAG_HISTORY_MAX_TURNS,
+        token_budget: int = RAG_HISTORY_TOKEN_BUDGET,
+        expiration: int = RAG_HISTORY_EXPIRATION,
+    ):
+        super().__init__(max_turns, token_budget, expiration)
+        # Fail fast so the loader can fallback to local provider
+        cache_db.ping()
+
+    @override
+    def _push(self, key, turn):
+        # Push, trim and refresh expiration in one round trip
+        pipe = cache_db.pipeline()
+        pipe.rpush(key, orjson.dumps(turn))
+        pipe.ltrim(key, -self.max_turns, -1)
+        pipe.expire(key, self.expiration)
+        pipe.expire(f"{key}:summary", self.expiration)
+        pipe.execute()
+
+    @override
+    def _range(self, key):
+        return [orjson.loads(turn) for turn in cache_db.lrange(key, 0, -1)]
+
+    @override
+    def _drop_oldest(self, key, count):
+        cache_db.ltrim(key, count, -1)
+
+    @override
+    def _get_summary(self, key):
+        return cache_db.get(f"{key}:summary") or ""
+
+    @override
+    def _set_summary(self, key, summary):
+        cache_db.set(f"{key}:summary", summary, ex=self.expiration)
+
+    @override
+    def _delete(self, key):
+        cache_db.delete(key, f"{key}:summary")
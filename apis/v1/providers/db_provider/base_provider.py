@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Any, AnyStr, Dict, List
+from typing import Any, AnyStr, Dict, List, Tuple
 
 
 class BaseDatabaseProvider:
@@ -18,6 +18,11 @@ class BaseDatabaseProvider:
         query_similar: Query the collection for documents where the key is similar to the value.
         create: Create a new document in the collection.
         update: Update a document in the collection.
+        array_append: Atomically add values to an array field of a document.
+        array_remove: Atomically remove values from an array field of a document.
+        increment: Atomically increment a numeric field of a document.
+        array_move: Atomically move values from an array field to another of a document.
+        update_arrays: Add or remove values of array fields of documents across collections, in one write.
         delete: Delete a document from the collection.
     '''
 
@@ -85,6 +90,44 @@ class BaseDatabaseProvider:
         '''
         raise NotImplementedError
 
+    @abstractmethod
+    def array_append(self, doc_id: AnyStr, key: AnyStr, values: List[Any]) -> None:
+        '''
+        Atomically add values missing from an array field of a document.
+        Only the delta is sent, concurrent updates are not lost.
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def array_remove(self, doc_id: AnyStr, key: AnyStr, values: List[Any]) -> None:
+        '''
+        Atomically remove values from an array field of a document.
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def increment(self, doc_id: AnyStr, key: AnyStr, amount: int | float = 1) -> None:
+        '''
+        Atomically increment a numeric field of a document.
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def array_move(self, doc_id: AnyStr, source_key: AnyStr, target_key: AnyStr, values: List[Any]) -> None:
+        '''
+        Atomically remove values from an array field and add them to another, in one write.
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_arrays(self, writes: List[Tuple["BaseDatabaseProvider", AnyStr, AnyStr, List[Any], bool]]) -> None:
+        '''
+        Add (without duplicates) or remove values of array fields, given as (provider, doc_id, key, values, is_add).
+        The documents may belong to other collections of the same database, all writes are committed together.
+        Missing documents are not created.
+        '''
+        raise NotImplementedError
+
     @abstractmethod
     def delete(self, doc_id: AnyStr) -> None:
         '''
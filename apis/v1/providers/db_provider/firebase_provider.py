@@ -5,6 +5,7 @@ from .base_provider import BaseDatabaseProvider
 from ..cache_provider import cacher
 from ...configs.firebase_config import db
 from ...utils.logger import logger_decorator
+from ...utils.constants import FIRESTORE_BATCH_LIMIT
 
 
 class FirebaseDatabaseProvider(BaseDatabaseProvider):
@@ -43,15 +44,22 @@ class FirebaseDatabaseProvider(BaseDatabaseProvider):
             ids[i]) for i in miss_cached_doc_ids]
 
         if len(doc_refs) != 0:
-            docs = db.get_all(references=doc_refs)
-
-            for doc, i in zip(docs, miss_cached_doc_ids):
+            # Documents are returned in any order, match them by id
+            docs = {doc.id: doc for doc in db.get_all(references=doc_refs) if doc.exists}
+
+            doc_map = {}
+            for i in miss_cached_doc_ids:
+                doc = docs.get(ids[i])
+                if doc is None:
+                    continue
                 doc_dict = doc.to_dict()
                 doc_dict[self.id_field] = doc.id
                 cached_docs[i] = doc_dict
+                doc_map[f"{self.collection_name}:{doc.id}"] = doc_dict
 
-                # Save to cache
-                cacher.set(f"{self.collection_name}:{doc.id}", doc_dict)
+            # Save to cache
+            if len(doc_map) != 0:
+                cacher.sets(doc_map)
 
         return cached_docs
 
@@ -125,6 +133,69 @@ class FirebaseDatabaseProvider(BaseDatabaseProvider):
 
         self.collection.document(doc_id).set(data, merge=merge)
 
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def array_append(self, doc_id, key, values):
+        self.collection.document(doc_id).update({key: firestore.firestore.ArrayUnion(values)})
+
+        # Apply the same delta to cache
+        cacher.update_array(self.get_cache_field_by_id(doc_id), key, values, is_add=True)
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def array_remove(self, doc_id, key, values):
+        self.collection.document(doc_id).update({key: firestore.firestore.ArrayRemove(values)})
+
+        # Apply the same delta to cache
+        cacher.update_array(self.get_cache_field_by_id(doc_id), key, values, is_add=False)
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def increment(self, doc_id, key, amount=1):
+        self.collection.document(doc_id).update({key: firestore.firestore.Increment(amount)})
+
+        # Apply the same delta to cache
+        cacher.increment(self.get_cache_field_by_id(doc_id), key, amount)
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def array_move(self, doc_id, source_key, target_key, values):
+        if len(values) == 0:
+            return
+
+        # Both transforms are applied by one write, the lists are never out of sync
+        self.collection.document(doc_id).update({
+            source_key: firestore.firestore.ArrayRemove(values),
+            target_key: firestore.firestore.ArrayUnion(values),
+        })
+
+        # Apply the same delta to cache
+        cache_key = self.get_cache_field_by_id(doc_id)
+        cacher.update_array(cache_key, source_key, values, is_add=False)
+        cacher.update_array(cache_key, target_key, values, is_add=True)
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def update_arrays(self, writes):
+        writes = [write for write in writes if len(write[3]) != 0]
+        if len(writes) == 0:
+            return
+
+        # Writes of all collections go in the same batch, only more than one batch of writes is not atomic
+        for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            for provider, doc_id, key, values, is_add in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+                transform = firestore.firestore.ArrayUnion(values) if is_add else firestore.firestore.ArrayRemove(values)
+                batch.update(provider.collection.document(doc_id), {key: transform})
+            batch.commit()
+
+        # Apply the same delta to cached documents, in one cache update per field and delta
+        groups = {}
+        for provider, doc_id, key, values, is_add in writes:
+            groups.setdefault((key, tuple(values), is_add), []).append(provider.get_cache_field_by_id(doc_id))
+        for (key, values, is_add), cache_keys in groups.items():
+            cacher.update_arrays(cache_keys, key, list(values), is_add)
+
     @override
     @logger_decorator(prefix="DATABASE")
     def delete(self, doc_id):
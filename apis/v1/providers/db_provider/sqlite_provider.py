@@ -0,0 +1,204 @@
+from typing import AnyStr, Callable, Dict, List
+from typing_extensions import override
+import re
+import uuid
+import orjson
+from contextlib import contextmanager
+from fastapi import HTTPException, status
+from .base_provider import BaseDatabaseProvider
+from ...configs.sqlite_config import get_connection
+from ...utils.logger import logger_decorator
+from ...utils.utils import apply_array_delta
+
+# Field names are inlined in index and query statements, only plain names are allowed
+FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Maximum bound parameters of one statement
+SQLITE_BATCH_LIMIT = 500
+
+
+class SqliteDatabaseProvider(BaseDatabaseProvider):
+    '''
+    Embedded database provider on SQLite, for single-node deployments and hermetic tests.
+    Each collection is a table of JSON documents keyed by id.
+    Queried fields get an expression index, statements are prepared once and cached by the driver.
+    '''
+
+    def __init__(self, collection_name: AnyStr):
+        super().__init__(collection_name)
+        self.id_field = "id"
+        self.table = f'"{collection_name}"'
+        self.indexed_fields = set()
+
+        # Statements are kept as constants, so the driver reuses their prepared form
+        self.select_all_sql = f"SELECT id, data FROM {self.table}"
+        self.select_by_id_sql = f"SELECT id, data FROM {self.table} WHERE id = ?"
+        self.insert_sql = f"INSERT INTO {self.table} (id, data) VALUES (?, ?)"
+        self.upsert_sql = f"INSERT INTO {self.table} (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data"
+        self.merge_sql = f"INSERT INTO {self.table} (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = json_patch(data, excluded.data)"
+        self.update_sql = f"UPDATE {self.table} SET data = ? WHERE id = ?"
+        self.delete_sql = f"DELETE FROM {self.table} WHERE id = ?"
+
+        get_connection().execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID")
+
+    def _to_doc(self, row) -> Dict:
+        doc = orjson.loads(row[1])
+        doc[self.id_field] = row[0]
+        return doc
+
+    def _get_field(self, key: AnyStr) -> AnyStr:
+        '''
+        Get the JSON expression of a field, indexed on first use.
+        '''
+        if not FIELD_PATTERN.match(key):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid field name: {key}"
+            )
+        expression = f"json_extract(data, '$.{key}')"
+        if key not in self.indexed_fields:
+            get_connection().execute(
+                f'CREATE INDEX IF NOT EXISTS "{self.collection_name}__{key}" ON {self.table} ({expression})')
+            self.indexed_fields.add(key)
+        return expression
+
+    @contextmanager
+    def _transaction(self):
+        # Take the write lock upfront, read-modify-write updates are atomic
+        connection = get_connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _modify(self, doc_ids: List[AnyStr], modify: Callable[[Dict], None]) -> None:
+        '''
+        Apply a modification to existing documents in one transaction.
+        '''
+        with self._transaction() as connection:
+            self._modify_in(connection, doc_ids, modify)
+
+    def _modify_in(self, connection, doc_ids: List[AnyStr], modify: Callable[[Dict], None]) -> None:
+        '''
+        Apply a modification to existing documents, inside the open transaction.
+        '''
+        for start in range(0, len(doc_ids), SQLITE_BATCH_LIMIT):
+            batch_ids = doc_ids[start:start + SQLITE_BATCH_LIMIT]
+            rows = connection.execute(
+                f"SELECT id, data FROM {self.table} WHERE id IN ({','.join('?' * len(batch_ids))})", batch_ids).fetchall()
+            updates = []
+            for row in rows:
+                doc = orjson.loads(row[1])
+                modify(doc)
+                updates.append((orjson.dumps(doc).decode(), row[0]))
+            connection.executemany(self.update_sql, updates)
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def get_all(self):
+        return [self._to_doc(row) for row in get_connection().execute(self.select_all_sql)]
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def get_all_by_ids(self, ids):
+        # Batched lookup, documents are returned in the order of ids, None when missing
+        doc_map = {}
+        connection = get_connection()
+        for start in range(0, len(ids), SQLITE_BATCH_LIMIT):
+            batch_ids = ids[start:start + SQLITE_BATCH_LIMIT]
+            for row in connection.execute(
+                    f"SELECT id, data FROM {self.table} WHERE id IN ({','.join('?' * len(batch_ids))})", batch_ids):
+                doc_map[row[0]] = self._to_doc(row)
+        return [doc_map.get(_id) for _id in ids]
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def get_by_id(self, doc_id):
+        if doc_id is None or doc_id == "":
+            return None
+
+        row = get_connection().execute(self.select_by_id_sql, (doc_id,)).fetchone()
+        return self._to_doc(row) if row else None
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def query_equal(self, key, value):
+        rows = get_connection().execute(
+            f"SELECT id, data FROM {self.table} WHERE {self._get_field(key)} = ?", (value,))
+        return [self._to_doc(row) for row in rows]
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def query_similar(self, key, value):
+        # Prefix match as a range, served by the field index
+        field = self._get_field(key)
+        rows = get_connection().execute(
+            f"SELECT id, data FROM {self.table} WHERE {field} >= ? AND {field} <= ?", (value, value + "\uf8ff"))
+        return [self._to_doc(row) for row in rows]
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def create(self, data):
+        doc_id = uuid.uuid4().hex[:20]
+        get_connection().execute(self.insert_sql, (doc_id, orjson.dumps(data).decode()))
+        return doc_id
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def update(self, doc_id, data, merge=True):
+        # Create the document when missing, like Firestore set
+        get_connection().execute(
+            self.merge_sql if merge else self.upsert_sql, (doc_id, orjson.dumps(data).decode()))
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def array_append(self, doc_id, key, values):
+        self._modify([doc_id], lambda doc: doc.update({key: apply_array_delta(doc.get(key), values, True)}))
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def array_remove(self, doc_id, key, values):
+        self._modify([doc_id], lambda doc: doc.update({key: apply_array_delta(doc.get(key), values, False)}))
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def increment(self, doc_id, key, amount=1):
+        self._modify([doc_id], lambda doc: doc.update({key: (doc.get(key) or 0) + amount}))
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def array_move(self, doc_id, source_key, target_key, values):
+        if len(values) == 0:
+            return
+
+        def _move(doc: Dict):
+            doc[source_key] = apply_array_delta(doc.get(source_key), values, False)
+            doc[target_key] = apply_array_delta(doc.get(target_key), values, True)
+        self._modify([doc_id], _move)
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def update_arrays(self, writes):
+        writes = [write for write in writes if len(write[3]) != 0]
+        if len(writes) == 0:
+            return
+
+        # Documents with the same delta are modified together
+        groups = {}
+        for provider, doc_id, key, values, is_add in writes:
+            groups.setdefault((provider, key, tuple(values), is_add), []).append(doc_id)
+
+        # Collections share the connection, one transaction spans all tables
+        with self._transaction() as connection:
+            for (provider, key, values, is_add), doc_ids in groups.items():
+                provider._modify_in(
+                    connection, doc_ids,
+                    lambda doc, key=key, values=list(values), is_add=is_add: doc.update({key: apply_array_delta(doc.get(key), values, is_add)}))
+
+    @override
+    @logger_decorator(prefix="DATABASE")
+    def delete(self, doc_id):
+        get_connection().execute(self.delete_sql, (doc_id,))
@@ -0,0 +1,187 @@
+from typing import AnyStr, Dict, List
+import re
+import time
+import asyncio
+import logging
+import httpx
+from fastapi import HTTPException, status
+from jose import jwt, JWTError
+from ..utils.constants import (
+    GOOGLE_VERIFY_URL,
+    GOOGLE_CERTS_URL,
+    GOOGLE_CLIENT_ID,
+    GOOGLE_ISSUERS,
+    GOOGLE_JWKS_REFRESH_INTERVAL,
+    GOOGLE_HTTP_TIMEOUT,
+)
+
+
+logger = logging.getLogger("uvicorn.info")
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class GoogleAuthProvider:
+    '''
+    Verify Google credentials without blocking the event loop.
+    Access tokens are verified by the userinfo endpoint through a pooled async HTTP client.
+    ID tokens are verified offline against the cached Google signing keys (JWKS),
+    which are refreshed in background before they expire.
+    Both endpoints can be pointed at a local stub, or the HTTP transport replaced, in tests.
+    '''
+
+    def __init__(
+        self,
+        verify_url: AnyStr = GOOGLE_VERIFY_URL,
+        certs_url: AnyStr = GOOGLE_CERTS_URL,
+        client_id: AnyStr = GOOGLE_CLIENT_ID,
+        issuers: List[AnyStr] = GOOGLE_ISSUERS,
+        refresh_interval: int = GOOGLE_JWKS_REFRESH_INTERVAL,
+        timeout: float = GOOGLE_HTTP_TIMEOUT,
+        transport: httpx.AsyncBaseTransport = None,
+    ):
+        self.verify_url = verify_url
+        self.certs_url = certs_url
+        self.client_id = client_id
+        self.issuers = issuers
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        # {kid: JWK}
+        self.keys: Dict[AnyStr, Dict] = {}
+        self.keys_expire_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        # Created lazily, inside the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def get_user_info(self, access_token: AnyStr) -> Dict:
+        '''
+        Get the user information of a Google access token.
+        '''
+        try:
+            response = await self.get_client().get(self.verify_url + access_token, headers={
+                "Authorization": f"Bearer {access_token}",
+                "Accept": "application/json",
+            })
+        except httpx.HTTPError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Google API unavailable. {str(e)}"
+            )
+
+        # Handle error and response
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail="Google API Error"
+            )
+        return response.json()
+
+    async def verify_id_token(self, id_token: AnyStr) -> Dict:
+        '''
+        Verify a Google ID token locally with the cached signing keys.
+        Return the claims of the token, which contain the user information.
+        '''
+        # Without a client id any Google token of any app would be accepted
+        if not self.client_id:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Google sign-in with ID token is not configured."
+            )
+
+        try:
+            kid = jwt.get_unverified_header(id_token).get("kid")
+        except JWTError as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid Google ID token. {str(e)}"
+            )
+
+        key = (await self.get_keys()).get(kid)
+        # Keys are rotated by Google, refresh once on an unknown key id
+        if key is None:
+            key = (await self.refresh_keys()).get(kid)
+        if key is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid Google ID token. Unknown signing key."
+            )
+
+        try:
+            claims = jwt.decode(
+                id_token,
+                key,
+                algorithms=[key.get("alg", "RS256")],
+                audience=self.client_id,
+                options={"verify_at_hash": False},
+            )
+        except JWTError as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid Google ID token. {str(e)}"
+            )
+
+        if claims.get("iss") not in self.issuers:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid Google ID token. Unknown issuer."
+            )
+        if claims.get("email_verified") not in (True, "true"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid Google ID token. Email is not verified."
+            )
+        return claims
+
+    async def get_keys(self) -> Dict[AnyStr, Dict]:
+        '''
+        Get the cached signing keys.
+        Only the first call waits for the keys, expiring keys are refreshed in background.
+        '''
+        if len(self.keys) == 0:
+            return await self.refresh_keys()
+
+        # Refresh ahead of expiration, the current keys stay valid meanwhile
+        if time.time() >= self.keys_expire_at - self.refresh_interval / 10 and (
+                self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_keys_safe())
+        return self.keys
+
+    async def refresh_keys(self) -> Dict[AnyStr, Dict]:
+        try:
+            response = await self.get_client().get(self.certs_url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Google signing keys unavailable. {str(e)}"
+            )
+
+        # Follow the cache lifetime announced by Google
+        match = MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+        max_age = int(match.group(1)) if match else self.refresh_interval
+
+        self.keys = {key["kid"]: key for key in response.json().get("keys", [])}
+        self.keys_expire_at = time.time() + max_age
+        return self.keys
+
+    async def _refresh_keys_safe(self) -> None:
+        try:
+            await self.refresh_keys()
+        except Exception as e:
+            logger.warning(f"Failed to refresh Google signing keys. {str(e)}")
@@ -0,0 +1,135 @@
+from typing import Any, AnyStr, Dict, List
+from uuid import UUID
+import time
+import threading
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from ..utils.utils import count_tokens
+from ..utils.metrics import (
+    llm_request_latency,
+    llm_time_to_first_token,
+    llm_requests,
+    llm_tokens,
+    llm_cost,
+)
+from ..utils.constants import LLM_TOKEN_PRICES, LLM_OTEL_ENABLED
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+class LLMMetricsProvider(BaseCallbackHandler):
+    '''
+    LangChain callback recording latency, time to first token and tokens of every LLM call.
+    Calls are labeled by provider and model from the run metadata, and exported as Prometheus metrics.
+    Spans, when OpenTelemetry is enabled, also carry the project and user of the call,
+    which are too many to be metric labels.
+    '''
+    # Recording is cheap, run in the caller instead of an executor
+    run_inline = True
+
+    def __init__(self, prices: Dict[AnyStr, tuple] = LLM_TOKEN_PRICES, otel_enabled: bool = LLM_OTEL_ENABLED):
+        self.prices = prices
+        self.tracer = trace.get_tracer(__name__) if otel_enabled and trace is not None else None
+        # {run_id: state of the running call}
+        self.runs: Dict[UUID, Dict] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        run = {
+            "started": time.perf_counter(),
+            "first_token": None,
+            "messages": messages,
+            "provider": metadata.get("llm_provider") or metadata.get("ls_provider", ""),
+            # Gemini models are reported as `models/{name}`, priced and labeled by name
+            "model": metadata.get("ls_model_name", "").removeprefix("models/"),
+            "span": None,
+        }
+        if self.tracer is not None:
+            run["span"] = self.tracer.start_span("llm.call", attributes={
+                "llm.provider": run["provider"],
+                "llm.model": run["model"],
+                "project.id": metadata.get("project_id", ""),
+                "user.id": metadata.get("user_id", ""),
+            })
+        with self._lock:
+            self.runs[run_id] = run
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self.runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self.runs.pop(run_id, None)
+        if run is None:
+            return
+
+        elapsed = time.perf_counter() - run["started"]
+        prompt_tokens, completion_tokens = self._get_usage(response, run["messages"])
+        provider, model = run["provider"], run["model"]
+
+        llm_request_latency.labels(provider, model, "ok").observe(elapsed)
+        llm_requests.labels(provider, model, "ok").inc()
+        if run["first_token"] is not None:
+            llm_time_to_first_token.labels(provider, model).observe(run["first_token"] - run["started"])
+        llm_tokens.labels(provider, model, "prompt").inc(prompt_tokens)
+        llm_tokens.labels(provider, model, "completion").inc(completion_tokens)
+        if model in self.prices:
+            prompt_price, completion_price = self.prices[model]
+            llm_cost.labels(provider, model).inc(
+                (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000)
+
+        if run["span"] is not None:
+            run["span"].set_attribute("llm.prompt_tokens", prompt_tokens)
+            run["span"].set_attribute("llm.completion_tokens", completion_tokens)
+            if run["first_token"] is not None:
+                run["span"].set_attribute("llm.time_to_first_token", run["first_token"] - run["started"])
+            run["span"].end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self.runs.pop(run_id, None)
+        if run is None:
+            return
+
+        # Cancelled hedged calls are recorded too, they still cost provider capacity
+        elapsed = time.perf_counter() - run["started"]
+        llm_request_latency.labels(run["provider"], run["model"], "error").observe(elapsed)
+        llm_requests.labels(run["provider"], run["model"], "error").inc()
+        if run["span"] is not None:
+            run["span"].record_exception(error)
+            run["span"].end()
+
+    @staticmethod
+    def _get_usage(response: LLMResult, messages: List[List[BaseMessage]]) -> tuple[int, int]:
+        '''
+        Get (prompt, completion) tokens reported by the provider.
+        Count them locally when the provider reports nothing (e.g. streamed calls).
+        '''
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage.get("prompt_tokens") is not None:
+            return usage["prompt_tokens"], usage.get("completion_tokens", 0)
+
+        generations = [generation for _generations in response.generations for generation in _generations]
+        for generation in generations:
+            usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage_metadata:
+                return usage_metadata.get("input_tokens", 0), usage_metadata.get("output_tokens", 0)
+
+        prompt = "".join(str(message.content) for _messages in messages for message in _messages)
+        completion = "".join(generation.text for generation in generations)
+        return count_tokens(prompt), count_tokens(completion)
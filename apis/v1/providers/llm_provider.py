@@ -0,0 +1,208 @@
+from typing import Any, AnyStr, AsyncIterator, Callable, Dict, List, Tuple
+from collections import deque
+import time
+import asyncio
+import logging
+from fastapi import HTTPException, status
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.callbacks import BaseCallbackHandler
+from ..utils.constants import (
+    DEFAULT_LLM_PROVIDER,
+    LLM_CONCURRENCY_LIMIT,
+    LLM_DEADLINE,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_LATENCY_WINDOW,
+)
+
+
+logger = logging.getLogger("uvicorn.info")
+
+
+class LLMRouterProvider:
+    '''
+    Route LLM calls to the model chosen per request.
+    Each provider has its own concurrency limit and deadline. When the primary
+    provider is slower than its latency percentile, a hedged request is sent to
+    the backup provider and the first answer wins.
+    '''
+
+    def __init__(
+        self,
+        models: Dict[AnyStr, BaseChatModel],
+        default: AnyStr = DEFAULT_LLM_PROVIDER,
+        concurrency_limits: Dict[AnyStr, int] = None,
+        deadlines: Dict[AnyStr, float] = None,
+        hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+        hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        callbacks: List[BaseCallbackHandler] = None,
+    ):
+        self.models = models
+        self.default = default
+        self.concurrency_limits = {
+            name: (concurrency_limits or {}).get(name, LLM_CONCURRENCY_LIMIT) for name in models}
+        self.deadlines = {
+            name: (deadlines or {}).get(name, LLM_DEADLINE) for name in models}
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = {name: deque(maxlen=LLM_LATENCY_WINDOW) for name in models}
+        self._semaphores = {}
+        self.callbacks = callbacks or []
+
+    def get_provider(self, name: AnyStr = None) -> AnyStr:
+        if name in self.models:
+            return name
+        return self.default
+
+    def get_model(self, name: AnyStr = None) -> BaseChatModel:
+        return self.models[self.get_provider(name)]
+
+    def get_model_name(self, name: AnyStr = None) -> AnyStr:
+        model = self.get_model(name)
+        return getattr(model, "model_name", None) or getattr(model, "model", "")
+
+    def get_backup(self, name: AnyStr) -> AnyStr | None:
+        # First other provider is the backup
+        return next((_name for _name in self.models if _name != name), None)
+
+    def get_config(self, name: AnyStr, metadata: Dict[str, Any] = None) -> RunnableConfig:
+        '''
+        Get the run config of a call, with the instrumentation callbacks and the metadata of the call.
+        '''
+        return {
+            "callbacks": self.callbacks,
+            "metadata": {**(metadata or {}), "llm_provider": name},
+        }
+
+    def _get_semaphore(self, name: AnyStr) -> asyncio.Semaphore:
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(self.concurrency_limits[name])
+        return self._semaphores[name]
+
+    def get_hedge_delay(self, name: AnyStr) -> float | None:
+        '''
+        Get the latency percentile of the provider.
+        Return None until enough calls are recorded.
+        '''
+        latencies = self.latencies[name]
+        if len(latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[int(self.hedge_percentile * (len(ordered) - 1))]
+
+    async def _run(self, name: AnyStr, build_chain: Callable[[BaseChatModel], Runnable], inputs: Any, metadata: Dict[str, Any] = None) -> Any:
+        async with self._get_semaphore(name):
+            _s = time.perf_counter()
+            result = await asyncio.wait_for(
+                build_chain(self.models[name]).ainvoke(inputs, config=self.get_config(name, metadata)),
+                timeout=self.deadlines[name])
+            self.latencies[name].append(time.perf_counter() - _s)
+            return result
+
+    def _raise(self, error: Exception):
+        if isinstance(error, asyncio.TimeoutError):
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="LLM deadline exceeded."
+            )
+        raise error
+
+    async def ainvoke(
+        self,
+        build_chain: Callable[[BaseChatModel], Runnable],
+        inputs: Any,
+        name: AnyStr = None,
+        hedge: bool = True,
+        metadata: Dict[str, Any] = None,
+    ) -> Tuple[AnyStr, Any]:
+        '''
+        Invoke the chain built on the chosen model, hedged to the backup model.
+        The metadata (e.g. project_id, user_id) labels the recorded metrics of the call.
+        Return the provider which answered and the result.
+        '''
+        primary = self.get_provider(name)
+        backup = self.get_backup(primary) if hedge else None
+        pending = {asyncio.create_task(self._run(primary, build_chain, inputs, metadata)): primary}
+        hedged = False
+        error = None
+
+        try:
+            while pending:
+                wait_hedge = backup is not None and not hedged
+                done, _ = await asyncio.wait(
+                    pending.keys(),
+                    timeout=self.get_hedge_delay(primary) if wait_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return provider, task.result()
+                    error = task.exception()
+                    logger.warning(f"LLM `{provider}` failed. {str(error)}")
+
+                # Hedge when the primary is slow, fallback when it failed
+                if wait_hedge and (len(done) == 0 or len(pending) == 0):
+                    hedged = True
+                    pending[asyncio.create_task(self._run(backup, build_chain, inputs, metadata))] = backup
+
+            self._raise(error)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def astream(
+        self,
+        build_chain: Callable[[BaseChatModel], Runnable],
+        inputs: Any,
+        name: AnyStr = None,
+        metadata: Dict[str, Any] = None,
+    ) -> Tuple[AnyStr, AsyncIterator]:
+        '''
+        Start streaming the chain built on the chosen model.
+        Fallback to the backup model when the primary fails before its first token.
+        Return the provider which answered and the token iterator.
+        '''
+        primary = self.get_provider(name)
+        backup = self.get_backup(primary)
+        error = None
+
+        for provider in [primary] + ([backup] if backup else []):
+            semaphore = self._get_semaphore(provider)
+            await semaphore.acquire()
+            _s = time.perf_counter()
+            stream = build_chain(self.models[provider]).astream(
+                inputs, config=self.get_config(provider, metadata)).__aiter__()
+            try:
+                first = await asyncio.wait_for(stream.__anext__(), timeout=self.deadlines[provider])
+            except StopAsyncIteration:
+                first = None
+            except Exception as e:
+                semaphore.release()
+                error = e
+                logger.warning(f"LLM `{provider}` failed. {str(e)}")
+                continue
+            return provider, self._continue_stream(provider, semaphore, stream, first, _s)
+
+        self._raise(error)
+
+    async def _continue_stream(self, provider: AnyStr, semaphore: asyncio.Semaphore, stream: AsyncIterator, first: Any, started: float):
+        try:
+            if first is not None:
+                yield first
+            while True:
+                # The deadline bounds the whole stream, a provider stalling between chunks is cut too
+                remaining = self.deadlines[provider] - (time.perf_counter() - started)
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(remaining, 0))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    self._raise(e)
+                yield chunk
+        finally:
+            semaphore.release()
+            # Cancel the underlying request of an abandoned stream
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
@@ -1,5 +1,6 @@
-from typing import Any
+from typing import Any, BinaryIO
 import os
+import shutil
 
 
 class MemoryProvider:
@@ -52,6 +53,13 @@ class MemoryProvider:
             f.write(data)
         return cache_file_path
 
+    def save_cache_stream(self, file: BinaryIO, filename: str, chunk_size: int = 1024 * 1024) -> str:
+        # Copy file to cache chunk by chunk, it is never fully loaded in memory
+        cache_file_path = os.path.join(self.cache_dir, filename)
+        with open(cache_file_path, "wb") as f:
+            shutil.copyfileobj(file, f, chunk_size)
+        return cache_file_path
+
     def remove_cache_file(self, filename: str) -> None:
         # Remove file from cache
         cache_file_path = os.path.join(self.cache_dir, filename)
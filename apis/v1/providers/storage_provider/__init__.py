@@ -0,0 +1,18 @@
+from typing import Type
+import os
+import importlib
+import logging
+from .base_provider import BaseStorageProvider
+
+
+logger = logging.getLogger("uvicorn.info")
+
+# Define Storage Provider alias
+provider_name = os.environ.get('STORAGE_PROVIDER', 'firebase')
+logger.info(f"Using `{provider_name}` as storage provider")
+
+# Import the storage provider based on the provider name
+provider_module = importlib.import_module(
+    f'.{provider_name}_provider', __package__)
+StorageProvider: Type[BaseStorageProvider] = getattr(
+    provider_module, f'{provider_name.capitalize()}StorageProvider')
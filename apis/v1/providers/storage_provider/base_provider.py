@@ -0,0 +1,76 @@
+from abc import abstractmethod
+from typing import Dict, Iterator
+import uuid
+from ...utils.constants import STORAGE_DOWNLOAD_CHUNK_SIZE, STORAGE_SIGNED_URL_EXPIRATION
+
+
+class BaseStorageProvider:
+    '''
+    Provide methods storing files.
+    Args:
+        directory: The directory of the files in the storage.
+
+    Methods:
+        upload: Upload a file, from its content or a local path.
+        download: Download a file, or a byte range of it.
+        stream: Stream a file chunk by chunk.
+        get_metadata: Get the size, ETag and content type of a file.
+        get_signed_url: Get a temporary URL downloading a file directly from the storage.
+        remove: Remove a file.
+    '''
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def get_ref(self, filename: str) -> str:
+        '''
+        Get the reference of the file in the storage.
+        '''
+        file_base_name = filename.split(".")[0]
+        file_extension = filename.split(".")[-1]
+        filename = f"{file_base_name}_{uuid.uuid4().hex[:5]}.{file_extension}"
+        return f"{self.directory}/{filename}"
+
+    @abstractmethod
+    def upload(self, file: bytes | str, filename: str, content_type: str) -> tuple[str, str]:
+        '''
+        Upload the file (content or local path) to the storage.
+        Return the file path and the URL of the file.
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def download(self, path: str, start: int = None, end: int = None) -> bytes:
+        '''
+        Download the file from the storage, or only the bytes from start to end (inclusive).
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream(self, path: str, start: int = 0, end: int = None, chunk_size: int = STORAGE_DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        '''
+        Stream the file from the storage chunk by chunk, from start to end (inclusive).
+        '''
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_metadata(self, path: str) -> Dict | None:
+        '''
+        Get the size, ETag and content type of the file.
+        Return None if the file does not exist.
+        '''
+        raise NotImplementedError
+
+    def get_signed_url(self, path: str, filename: str = None, expiration: int = STORAGE_SIGNED_URL_EXPIRATION) -> str | None:
+        '''
+        Get a temporary URL downloading the file directly from the storage.
+        Return None when the storage cannot serve files itself.
+        '''
+        return None
+
+    @abstractmethod
+    def remove(self, path: str) -> None:
+        '''
+        Remove the file from the storage.
+        '''
+        raise NotImplementedError
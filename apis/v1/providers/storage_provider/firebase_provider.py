@@ -0,0 +1,134 @@
+from typing import Dict, Iterator
+from typing_extensions import override
+import io
+import os
+import datetime
+from google.cloud.storage import transfer_manager
+from .base_provider import BaseStorageProvider
+from ...configs.firebase_config import bucket
+from ...utils.logger import logger_decorator
+from ...utils.utils import content_disposition
+from ...utils.constants import (
+    STORAGE_CHUNK_SIZE,
+    STORAGE_PARALLEL_THRESHOLD,
+    STORAGE_MAX_WORKERS,
+    STORAGE_DOWNLOAD_CHUNK_SIZE,
+    STORAGE_SIGNED_URL_EXPIRATION,
+)
+
+
+class FirebaseStorageProvider(BaseStorageProvider):
+    '''
+    Store files in the Firebase (Google Cloud Storage) bucket.
+    Files are uploaded in resumable chunks, or in parallel parts when large,
+    and downloaded as a stream of chunks or by byte range.
+    '''
+
+    def __init__(
+        self,
+        directory: str,
+        chunk_size: int = STORAGE_CHUNK_SIZE,
+        parallel_threshold: int = STORAGE_PARALLEL_THRESHOLD,
+        max_workers: int = STORAGE_MAX_WORKERS,
+    ) -> None:
+        super().__init__(directory)
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.max_workers = max_workers
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def upload(self, file: bytes | str, filename: str, content_type: str) -> tuple[str, str]:
+        '''
+        Upload the file (content or local path) to the storage.
+        Large local files are sent as parallel parts, others as resumable chunks
+        with the public ACL applied by the upload itself.
+        Return the file path and the public URL of the file.
+        '''
+        path = self.get_ref(filename.replace(" ", "_"))
+        blob = bucket.blob(path)
+
+        if isinstance(file, str) and os.path.getsize(file) > self.parallel_threshold:
+            # Multipart uploads take no ACL, it is set once all parts are uploaded
+            transfer_manager.upload_chunks_concurrently(
+                file, blob,
+                content_type=content_type,
+                chunk_size=self.chunk_size,
+                max_workers=self.max_workers,
+                worker_type=transfer_manager.THREAD,
+            )
+            blob.make_public()
+        else:
+            blob.chunk_size = self.chunk_size
+            if isinstance(file, str):
+                blob.upload_from_filename(file, content_type=content_type, predefined_acl="publicRead")
+            else:
+                blob.upload_from_file(
+                    io.BytesIO(file), size=len(file), content_type=content_type, predefined_acl="publicRead")
+        return path, blob.public_url
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def download(self, path: str, start: int = None, end: int = None) -> bytes:
+        '''
+        Download the file from the storage, or only the bytes from start to end (inclusive).
+        '''
+        blob = bucket.blob(path)
+        return blob.download_as_bytes(start=start, end=end)
+
+    @override
+    def stream(self, path: str, start: int = 0, end: int = None, chunk_size: int = STORAGE_DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        '''
+        Stream the file from the storage chunk by chunk, from start to end (inclusive).
+        Only one chunk is held in memory at a time.
+        '''
+        blob = bucket.blob(path)
+        remaining = None if end is None else end - start + 1
+        with blob.open("rb", chunk_size=chunk_size) as reader:
+            if start:
+                reader.seek(start)
+            while remaining is None or remaining > 0:
+                chunk = reader.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def get_metadata(self, path: str) -> Dict | None:
+        '''
+        Get the size, ETag and content type of the file.
+        Return None if the file does not exist.
+        '''
+        blob = bucket.get_blob(path)
+        if blob is None:
+            return None
+        return {
+            "size": blob.size,
+            "etag": blob.etag,
+            "content_type": blob.content_type or "application/octet-stream",
+        }
+
+    @override
+    def get_signed_url(self, path: str, filename: str = None, expiration: int = STORAGE_SIGNED_URL_EXPIRATION) -> str:
+        '''
+        Get a temporary URL downloading the file directly from the storage.
+        '''
+        blob = bucket.blob(path)
+        return blob.generate_signed_url(
+            version="v4",
+            expiration=datetime.timedelta(seconds=expiration),
+            method="GET",
+            response_disposition=content_disposition(filename) if filename else None,
+        )
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def remove(self, path: str) -> None:
+        '''
+        Remove the file from the storage.
+        '''
+        blob = bucket.blob(path)
+        blob.delete()
@@ -0,0 +1,178 @@
+from typing import Dict, Iterator
+from typing_extensions import override
+import os
+import mmap
+import shutil
+import hashlib
+import tempfile
+from .base_provider import BaseStorageProvider
+from ...utils.logger import logger_decorator
+from ...utils.utils import get_content_type
+from ...utils.constants import (
+    STORAGE_LOCAL_DIR,
+    STORAGE_LOCAL_BASE_URL,
+    STORAGE_DOWNLOAD_CHUNK_SIZE,
+)
+
+# Attempts to link a file to its content, which a concurrent remove may delete in between
+STORAGE_LINK_RETRIES = 3
+
+
+class LocalStorageProvider(BaseStorageProvider):
+    '''
+    Store files on the local disk, for single-node installs and benchmarks.
+    Contents are stored once by SHA-256 under `objects/`, file paths are hard links to them,
+    so identical uploads share their bytes. Writes are atomic (temporary file then rename),
+    reads are memory mapped and copies use sendfile when available.
+    '''
+
+    def __init__(
+        self,
+        directory: str,
+        root: str = STORAGE_LOCAL_DIR,
+        base_url: str = STORAGE_LOCAL_BASE_URL,
+    ) -> None:
+        super().__init__(directory)
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.files_dir = os.path.join(self.root, "files")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.files_dir, exist_ok=True)
+
+    def _get_file_path(self, path: str) -> str:
+        # Keep file paths inside the storage root
+        file_path = os.path.abspath(os.path.join(self.files_dir, path))
+        if not file_path.startswith(self.files_dir + os.sep):
+            raise ValueError(f"Invalid storage path: {path}")
+        return file_path
+
+    def _get_object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    @staticmethod
+    def _hash_file(source: str) -> str:
+        # Hash through a memory map, without copying the file into Python buffers
+        with open(source, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return hashlib.sha256().hexdigest()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+
+    @staticmethod
+    def _copy_file(source: str, target) -> None:
+        # Copy in kernel space when possible
+        with open(source, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if hasattr(os, "sendfile"):
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(target.fileno(), file.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            else:
+                shutil.copyfileobj(file, target)
+
+    def _write_object(self, file: bytes | str) -> str:
+        '''
+        Store the content once, atomically. Return the object path.
+        '''
+        digest = hashlib.sha256(file).hexdigest() if isinstance(file, bytes) else self._hash_file(file)
+        object_path = self._get_object_path(digest)
+        if os.path.exists(object_path):
+            return object_path
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(object_path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as target:
+                if isinstance(file, bytes):
+                    target.write(file)
+                else:
+                    self._copy_file(file, target)
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(tmp_path, object_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return object_path
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def upload(self, file: bytes | str, filename: str, content_type: str) -> tuple[str, str]:
+        '''
+        Upload the file (content or local path) to the disk.
+        Return the file path and the URL of the file.
+        '''
+        path = self.get_ref(filename.replace(" ", "_"))
+
+        # Link the file path to the content, renamed into place atomically
+        file_path = self._get_file_path(path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.tmp-{os.getpid()}"
+        for attempt in range(STORAGE_LINK_RETRIES):
+            object_path = self._write_object(file)
+            try:
+                os.link(object_path, tmp_path)
+                break
+            except FileNotFoundError:
+                # The content was removed by a concurrent remove, write it again
+                if attempt == STORAGE_LINK_RETRIES - 1:
+                    raise
+        os.replace(tmp_path, file_path)
+
+        return path, f"{self.base_url}/{path}"
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def download(self, path: str, start: int = None, end: int = None) -> bytes:
+        with open(self._get_file_path(path), "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return b""
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[start or 0:size if end is None else end + 1]
+
+    @override
+    def stream(self, path: str, start: int = 0, end: int = None, chunk_size: int = STORAGE_DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self._get_file_path(path), "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return
+            end = size - 1 if end is None else min(end, size - 1)
+            # Pages are read by the kernel on demand, only one chunk is copied at a time
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(start or 0, end + 1, chunk_size):
+                    yield mapped[offset:min(offset + chunk_size, end + 1)]
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def get_metadata(self, path: str) -> Dict | None:
+        try:
+            stat = os.stat(self._get_file_path(path))
+        except FileNotFoundError:
+            return None
+        return {
+            "size": stat.st_size,
+            # Same content shares the inode, so the same ETag
+            "etag": f"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}",
+            "content_type": get_content_type(path),
+        }
+
+    @override
+    @logger_decorator(prefix="STORAGE")
+    def remove(self, path: str) -> None:
+        file_path = self._get_file_path(path)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return
+
+        # Remove the content too when this was its last file (object + this link)
+        object_path = self._get_object_path(self._hash_file(file_path)) if stat.st_nlink <= 2 else None
+        os.remove(file_path)
+        if object_path is not None and os.path.exists(object_path) and os.stat(object_path).st_ino == stat.st_ino:
+            os.remove(object_path)
@@ -1,73 +1,544 @@
 from typing import AnyStr, Dict, Any, List, Union
+import time
+import asyncio
+import threading
+import numpy as np
+import grpc
+from langchain_core.documents import Document
 from langchain_qdrant import Qdrant
+from qdrant_client.http.exceptions import ResponseHandlingException
 from qdrant_client.http.models import (
     models,
     VectorParams,
     Distance,
 )
 import os
-from ..utils.constants import DEFAULT_EMBEDDING_PROVIDER, DEFAULT_EMBEDDING_DIM
-from ..configs.qdrant_config import qdrant_client
-from ..configs.word_embedding_config import hgf_embedder
-from ..utils.logger import logger_decorator
+from ..utils.constants import (
+    DEFAULT_EMBEDDING_PROVIDER,
+    DEFAULT_RETRIEVER_K,
+    DEFAULT_SCORE_THRESHOLD,
+    DEFAULT_QUERY_LIMIT,
+    VECTOR_DB_HEALTH_CHECK_INTERVAL,
+)
+from ..configs.qdrant_config import (
+    qdrant_client,
+    async_qdrant_client,
+    create_qdrant_client,
+    create_async_qdrant_client,
+    CollectionProfile,
+    default_collection_profile,
+)
+from .word_embedding_provider import WordEmbeddingProvider
+from ..utils.logger import logger_decorator, logger
+
+
+def _is_transport_error(error: BaseException) -> bool:
+    # Only a broken connection is fixed by reconnecting, application errors (missing collection, bad filter) are not
+    if isinstance(error, grpc.RpcError):
+        code = getattr(error, "code", None)
+        return callable(code) and code() == grpc.StatusCode.UNAVAILABLE
+    return isinstance(error, (ResponseHandlingException, ConnectionError))
+
 
 class VectorDatabaseProvider:
-    def __init__(self, collection_name):
-        self.qdrant = None
-        self.collection_name = collection_name
+    '''
+    Provide Qdrant features over one long-lived sync and async gRPC client.
+    The LangChain store is bound to those clients once and only rebuilt
+    when the health check fails or a call fails on the transport.
+    Each embedding model gets its own collection, named {base_name}_{provider}_{dimension}.
+    The providers of all collections share the clients of the first one.
+    '''
 
-    @logger_decorator(prefix="VECTOR_DATABASE")
-    def create_collection(
+    def __init__(
         self,
-        provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER,
-        size: int = DEFAULT_EMBEDDING_DIM,
-        distance: Distance = Distance.COSINE
+        collection_name,
+        embedding: WordEmbeddingProvider,
+        embedding_provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER,
+        profile: CollectionProfile = default_collection_profile,
+        health_check_interval: int = VECTOR_DB_HEALTH_CHECK_INTERVAL,
+        parent: "VectorDatabaseProvider" = None,
     ):
-        if not qdrant_client.collection_exists(collection_name=self.collection_name):
-            qdrant_client.create_collection(
+        self.qdrant = None
+        self._root = parent or self
+        self.base_name = collection_name
+        self.embedding = embedding
+        self.embedding_provider = embedding.get_provider(embedding_provider)
+        self.embedder = embedding.get_embedder(self.embedding_provider)
+        self._collection_name = None
+        self._siblings = {}
+        self.profile = profile
+        self.content_key = Qdrant.CONTENT_KEY
+        self.metadata_key = Qdrant.METADATA_KEY
+        if parent is None:
+            self._client = qdrant_client
+            self._async_client = async_qdrant_client
+            # Replaced async clients, closed on the event loop by the next async call
+            self._retired_async_clients = []
+            self._lock = threading.Lock()
+        else:
+            self._lock = parent._lock
+        self.health_check_interval = health_check_interval
+        self._last_health_check = 0.0
+
+    @property
+    def client(self):
+        return self._root._client
+
+    @property
+    def async_client(self):
+        return self._root._async_client
+
+    @property
+    def collection_name(self) -> AnyStr:
+        # Resolved lazily, the model is probed on first use
+        if self._collection_name is None:
+            self._collection_name = self.embedding.get_collection_name(
+                self.base_name, self.embedding_provider)
+        return self._collection_name
+
+    def for_provider(self, provider: AnyStr) -> "VectorDatabaseProvider":
+        '''
+        Get the provider of the collection matching the embedding model.
+        The pooled clients are shared between them.
+        '''
+        provider = self.embedding.get_provider(provider)
+        if provider == self.embedding_provider:
+            return self
+        if provider not in self._siblings:
+            self._siblings[provider] = VectorDatabaseProvider(
+                self.base_name,
+                embedding=self.embedding,
+                embedding_provider=provider,
+                profile=self.profile,
+                health_check_interval=self.health_check_interval,
+                parent=self,
+            )
+        return self._siblings[provider]
+
+    def _bind_store(self) -> Qdrant:
+        # Bind LangChain store to the pooled clients, no new connection is made
+        self.qdrant = Qdrant(
+            client=self.client,
+            async_client=self.async_client,
+            collection_name=self.collection_name,
+            embeddings=self.embedder,
+        )
+        return self.qdrant
+
+    def _reconnect(self) -> None:
+        '''
+        Replace broken clients of the process, then re-bind the stores of all collections.
+        Must be called with the lock held.
+        '''
+        root = self._root
+        logger.warning(f"Reconnecting to Qdrant for `{self.collection_name}`")
+        old_client, old_async_client = root._client, root._async_client
+        root._client = create_qdrant_client()
+        root._async_client = create_async_qdrant_client()
+
+        # Release the channels of the replaced clients
+        try:
+            old_client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close Qdrant client. {str(e)}")
+        root._retired_async_clients.append(old_async_client)
+
+        for provider in [root, *root._siblings.values()]:
+            if provider.qdrant is not None:
+                provider._bind_store()
+
+    def _reconnect_safe(self, failed_client=None) -> None:
+        with self._lock:
+            # Another call already replaced the failed client
+            if failed_client is not None and failed_client is not self.async_client:
+                return
+            self._reconnect()
+            self._last_health_check = time.monotonic()
+
+    async def _close_retired_clients(self) -> None:
+        retired = self._root._retired_async_clients
+        while retired:
+            try:
+                await retired.pop().close()
+            except Exception as e:
+                logger.warning(f"Failed to close Qdrant async client. {str(e)}")
+
+    async def _async_call(self, method: AnyStr, **kwargs):
+        # Call the async client, reconnect once and retry when the connection is broken
+        await self._close_retired_clients()
+        async_client = self.async_client
+        try:
+            return await getattr(async_client, method)(**kwargs)
+        except Exception as e:
+            if not _is_transport_error(e):
+                raise
+            await asyncio.to_thread(self._reconnect_safe, async_client)
+            await self._close_retired_clients()
+            return await getattr(self.async_client, method)(**kwargs)
+
+    def _is_healthy(self) -> bool:
+        try:
+            self.client.get_collections()
+            return True
+        except Exception:
+            return False
+
+    def get_store(self) -> Qdrant:
+        '''
+        Get the LangChain store bound to the pooled clients.
+        Health is checked at most once per `health_check_interval` seconds.
+        '''
+        with self._lock:
+            if self.qdrant is None:
+                self._bind_store()
+
+            now = time.monotonic()
+            if now - self._last_health_check >= self.health_check_interval:
+                if not self._is_healthy():
+                    self._reconnect()
+                self._last_health_check = now
+
+            return self.qdrant
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    def create_collection(self, size: int = None, distance: Distance = None):
+        # Use the probed dimension, and dot product when vectors are already normalized
+        size = size or self.embedding.get_size(self.embedding_provider)
+        if distance is None:
+            distance = Distance.DOT if self.embedding.is_normalized(
+                self.embedding_provider) else Distance.COSINE
+
+        if not self.client.collection_exists(collection_name=self.collection_name):
+            self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=models.VectorParams(size=size, distance=distance),
+                vectors_config=self.profile.vector_params(size, distance),
+                hnsw_config=self.profile.hnsw_config(),
+                quantization_config=self.profile.quantization_config(),
             )
+            self.create_payload_indexes()
+        return True
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    def apply_profile(self, profile: CollectionProfile):
+        '''
+        Migrate an existing collection to a new tuning profile.
+        Qdrant rebuilds the index and quantized vectors in the background.
+        '''
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=profile.on_disk)},
+            hnsw_config=profile.hnsw_config(),
+            quantization_config=profile.quantization_config() or models.Disabled.DISABLED,
+        )
+        self.profile = profile
+        self.create_payload_indexes()
         return True
 
     @logger_decorator(prefix="VECTOR_DATABASE")
     def delete_collection(self):
         try:
-            qdrant_client.delete_collection(collection_name=self.collection_name)
+            self.client.delete_collection(collection_name=self.collection_name)
             return True
         except Exception as e:
-            print(f"Exception: {e}")
+            logger.warning(f"Failed to delete collection {self.collection_name}. {str(e)}")
             return False
 
     @logger_decorator(prefix="VECTOR_DATABASE")
-    def upload_documents_and_load_collection(self, splits):
-        qdrant = Qdrant.from_documents(
-            documents=splits, 
-            embedding=embedder, 
-            url=qdrant_client.host, 
-            api_key=qdrant_client.api_key, 
-            prefer_grpc=True, 
-            collection_name=self.collection_name
-        )
-        self.qdrant = qdrant
+    def upload_documents_and_load_collection(self, splits: List[Document], knowledge_id: AnyStr, project_id: AnyStr = None):
+        '''
+        Embed and upload the chunks of a knowledge.
+        Every chunk is stamped with its knowledge and project, scoped searches and deletions filter on them.
+        '''
+        for split in splits:
+            split.metadata = {**(split.metadata or {}), "knowledge_id": knowledge_id, "project_id": project_id}
+
+        self.create_collection()
+        qdrant = self.get_store()
+        qdrant.add_documents(splits)
         return qdrant
 
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    def upsert(self, ids: List[AnyStr], vectors: List[List[float]] | np.ndarray, documents: List[AnyStr], payloads: List[Dict]):
+        '''
+        Upload pre-computed vectors with the LangChain payload layout.
+        A float32 matrix is passed to the client without conversion.
+        '''
+        if isinstance(vectors, np.ndarray) and vectors.dtype != np.float32:
+            vectors = vectors.astype(np.float32)
+        self.create_collection()
+        self.client.upload_collection(
+            collection_name=self.collection_name,
+            vectors=vectors,
+            payload=[
+                {self.content_key: document, self.metadata_key: payload}
+                for document, payload in zip(documents, payloads)
+            ],
+            ids=ids,
+            wait=True,
+        )
+        return True
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    def delete(self, ids: List[AnyStr]):
+        if len(ids) == 0:
+            return True
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=ids),
+        )
+        return True
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    def delete_by_filter(self, knowledge_id: AnyStr = None, project_id: AnyStr = None):
+        '''
+        Delete the chunks of a knowledge or project, filtered by Qdrant without reading them.
+        '''
+        points_filter = self.build_filter(knowledge_id=knowledge_id, project_id=project_id)
+        # Never delete the whole collection by a missing condition
+        if points_filter is None or not self.client.collection_exists(collection_name=self.collection_name):
+            return True
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=points_filter),
+        )
+        return True
+
     @logger_decorator(prefix="VECTOR_DATABASE")
     def load_collection(self):
-        qdrant = Qdrant.from_existing_collection(
-            embedding=embedder,
-            url=qdrant_client.host, 
-            api_key=qdrant_client.api_key,
-            prefer_grpc=True, 
-            collection_name=self.collection_name
+        return self.get_store()
+
+    def build_filter(self, knowledge_id: AnyStr = None, project_id: AnyStr = None) -> models.Filter | None:
+        '''
+        Build a payload filter on the knowledge and project of the chunks.
+        Return None when no condition is given.
+        '''
+        conditions = [
+            models.FieldCondition(
+                key=f"{self.metadata_key}.{field}",
+                match=models.MatchValue(value=value)
+            )
+            for field, value in (("knowledge_id", knowledge_id), ("project_id", project_id))
+            if value is not None
+        ]
+        return models.Filter(must=conditions) if len(conditions) != 0 else None
+
+    def _to_document(self, point: models.ScoredPoint) -> Document:
+        payload = point.payload or {}
+        return Document(
+            page_content=payload.get(self.content_key, ""),
+            metadata={
+                **(payload.get(self.metadata_key) or {}),
+                "_id": point.id,
+                "_score": point.score,
+            }
         )
-        self.qdrant = qdrant
-        return qdrant
 
     @logger_decorator(prefix="VECTOR_DATABASE")
-    def get_retriever(self):
-        retriever = self.qdrant.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 3}
+    def create_payload_indexes(self, fields: List[AnyStr] = None):
+        '''
+        Index the filter fields so filtered search does not scan the collection.
+        '''
+        for field in fields or self.profile.payload_indexes:
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=f"{self.metadata_key}.{field}",
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+        return True
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    def get_retriever(
+        self,
+        knowledge_id: AnyStr = None,
+        project_id: AnyStr = None,
+        k: int = DEFAULT_RETRIEVER_K,
+        score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+    ):
+        search_kwargs = {
+            "k": k,
+            "filter": self.build_filter(knowledge_id, project_id),
+            "search_params": self.profile.search_params(),
+        }
+        search_type = "similarity"
+        if score_threshold is not None:
+            search_type = "similarity_score_threshold"
+            search_kwargs["score_threshold"] = score_threshold
+
+        retriever = self.get_store().as_retriever(
+            search_type=search_type,
+            search_kwargs=search_kwargs
         )
         return retriever
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    async def search(
+        self,
+        vector: List[float],
+        knowledge_id: AnyStr = None,
+        project_id: AnyStr = None,
+        k: int = DEFAULT_RETRIEVER_K,
+        score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+        with_vectors: bool = False,
+    ) -> List[models.ScoredPoint]:
+        '''
+        Search the nearest vectors, filtered by knowledge and/or project.
+        '''
+        return await self._async_call(
+            "search",
+            collection_name=self.collection_name,
+            query_vector=vector.tolist() if isinstance(vector, np.ndarray) else vector,
+            query_filter=self.build_filter(knowledge_id, project_id),
+            limit=k,
+            score_threshold=score_threshold,
+            search_params=self.profile.search_params(),
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    async def search_batch(
+        self,
+        vectors: List[List[float]],
+        knowledge_id: AnyStr = None,
+        project_id: AnyStr = None,
+        k: int = DEFAULT_RETRIEVER_K,
+        score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+        with_vectors: bool = False,
+    ) -> List[List[models.ScoredPoint]]:
+        '''
+        Search the nearest vectors of many queries in a single request.
+        '''
+        if len(vectors) == 0:
+            return []
+
+        query_filter = self.build_filter(knowledge_id, project_id)
+        search_params = self.profile.search_params()
+        requests = [
+            models.SearchRequest(
+                vector=vector.tolist() if isinstance(vector, np.ndarray) else list(vector),
+                filter=query_filter,
+                limit=k,
+                score_threshold=score_threshold,
+                params=search_params,
+                with_payload=True,
+                with_vector=with_vectors,
+            )
+            for vector in vectors
+        ]
+        return await self._async_call(
+            "search_batch",
+            collection_name=self.collection_name,
+            requests=requests,
+        )
+
+    async def similarity_search(self, query: AnyStr, **kwargs) -> List[Document]:
+        '''
+        Embed the query and return the matched chunks as documents.
+        '''
+        vector = await self.embedder.aembed_query(query)
+        return await self.similarity_search_by_vector(vector, **kwargs)
+
+    async def similarity_search_by_vector(self, vector: List[float], **kwargs) -> List[Document]:
+        '''
+        Return the matched chunks of an embedded query as documents.
+        '''
+        points = await self.search(vector, **kwargs)
+        return [self._to_document(point) for point in points]
+
+    async def max_marginal_relevance_search_by_vector(
+        self,
+        vector: List[float],
+        k: int = DEFAULT_RETRIEVER_K,
+        fetch_k: int = DEFAULT_QUERY_LIMIT,
+        lambda_mult: float = 0.5,
+        **kwargs,
+    ) -> List[Document]:
+        '''
+        Over-fetch `fetch_k` chunks, then select `k` relevant and diverse chunks in rank order.
+        '''
+        points = await self.search(vector, k=fetch_k, with_vectors=True, **kwargs)
+        return self._select_mmr(vector, points, k, lambda_mult)
+
+    async def similarity_search_batch_by_vector(self, vectors: List[List[float]], **kwargs) -> List[List[Document]]:
+        '''
+        Return the matched chunks of many embedded queries, searched in a single request.
+        '''
+        results = await self.search_batch(vectors, **kwargs)
+        return [[self._to_document(point) for point in points] for points in results]
+
+    async def max_marginal_relevance_search_batch_by_vector(
+        self,
+        vectors: List[List[float]],
+        k: int = DEFAULT_RETRIEVER_K,
+        fetch_k: int = DEFAULT_QUERY_LIMIT,
+        lambda_mult: float = 0.5,
+        **kwargs,
+    ) -> List[List[Document]]:
+        '''
+        Maximal marginal relevance search of many embedded queries, searched in a single request.
+        '''
+        results = await self.search_batch(vectors, k=fetch_k, with_vectors=True, **kwargs)
+        return [
+            self._select_mmr(vector, points, k, lambda_mult)
+            for vector, points in zip(vectors, results)
+        ]
+
+    def _select_mmr(self, vector: List[float], points: List[models.ScoredPoint], k: int, lambda_mult: float) -> List[Document]:
+        # Greedily pick the most relevant chunk least similar to the picked ones
+        if len(points) == 0:
+            return []
+
+        query = np.array(vector, dtype=np.float32)
+        candidates = np.asarray([point.vector for point in points], dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        candidates /= np.linalg.norm(candidates, axis=1, keepdims=True).clip(min=1e-12)
+
+        relevance = candidates @ query
+        similarity = candidates @ candidates.T
+        selected = [int(np.argmax(relevance))]
+        while len(selected) < min(k, len(points)):
+            remaining = [i for i in range(len(points)) if i not in selected]
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+            scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+            selected.append(remaining[int(np.argmax(scores))])
+
+        return [self._to_document(points[i]) for i in selected]
+
+    async def similarity_search_batch(self, queries: List[AnyStr], **kwargs) -> List[List[Document]]:
+        '''
+        Embed all queries at once and return the matched chunks per query.
+        '''
+        if len(queries) == 0:
+            return []
+        vectors = await self.embedder.aembed_documents(queries)
+        results = await self.search_batch(vectors, **kwargs)
+        return [[self._to_document(point) for point in points] for points in results]
+
+    @logger_decorator(prefix="VECTOR_DATABASE")
+    def dynamic_search(self, key: AnyStr = None, value: Any = None, batch_size: int = 256) -> List[models.Record]:
+        '''
+        Get all points of the collection where the metadata key equals the value.
+        Get all points when no key is given.
+        '''
+        scroll_filter = models.Filter(must=[
+            models.FieldCondition(
+                key=f"{self.metadata_key}.{key}",
+                match=models.MatchValue(value=value)
+            )
+        ]) if key is not None else None
+
+        records = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            records.extend(points)
+            if offset is None:
+                break
+        return records
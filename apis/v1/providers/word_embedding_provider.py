@@ -1,23 +1,59 @@
 from typing import AnyStr, List
+import threading
+import numpy as np
 from fastapi import HTTPException, status
+from langchain_core.embeddings import Embeddings
 from ..configs.word_embedding_config import hgf_embedder
-from ..utils.constants import DEFAULT_EMBEDDING_PROVIDER
+from ..utils.constants import DEFAULT_EMBEDDING_PROVIDER, EMBEDDING_BATCH_SIZE
 
 
 class WordEmbeddingProvider:
     '''
     Provide common word embedding features.
+    Keep a registry of embedding models with their probed dimension and normalization.
     '''
 
     def __init__(self):
         self.providers = {
-            "hgf": (hgf_embedder, 1024),
+            "hgf": hgf_embedder,
         }
+        # Probed (dimension, normalized) of each provider
+        self.specs = {}
+        self._lock = threading.Lock()
+
+    def register(self, provider: AnyStr, embedder: Embeddings) -> None:
+        '''
+        Register a new embedding model under the provider name.
+        '''
+        with self._lock:
+            self.providers[provider] = embedder
+            self.specs.pop(provider, None)
+
+    def get_provider(self, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER):
+        if provider in self.providers.keys():
+            return provider
+        else:
+            return DEFAULT_EMBEDDING_PROVIDER
+
+    def get_embedder(self, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER) -> Embeddings:
+        return self.providers[self.get_provider(provider)]
+
+    def probe(self, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER) -> tuple[int, bool]:
+        '''
+        Embed a probe text once to get the real dimension and normalization of the model.
+        '''
+        provider = self.get_provider(provider)
+        with self._lock:
+            if provider not in self.specs:
+                vector = np.asarray(
+                    self.providers[provider].embed_query("dimension probe"), dtype=np.float32)
+                normalized = bool(abs(np.linalg.norm(vector) - 1.0) < 1e-3)
+                self.specs[provider] = (vector.shape[0], normalized)
+            return self.specs[provider]
 
     def embed(self, data: AnyStr | List[AnyStr], provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER) -> List[List[float]]:
         # Get embedding provider
-        embedder = self.providers.get(
-            provider, self.providers[DEFAULT_EMBEDDING_PROVIDER])[0]
+        embedder = self.get_embedder(provider)
 
         if isinstance(data, str):
             return [embedder.embed_query(data)]
@@ -29,11 +65,33 @@ class WordEmbeddingProvider:
                 detail=f"Invalid data type for embedding. Got: {type(data)}"
             )
 
-    def get_provider(self, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER):
-        if provider in self.providers.keys():
-            return provider
-        else:
-            return DEFAULT_EMBEDDING_PROVIDER
+    def embed_matrix(
+        self,
+        data: List[AnyStr],
+        provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER,
+        dtype: np.dtype = np.float32,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+    ) -> np.ndarray:
+        '''
+        Embed documents into one preallocated matrix, batch by batch.
+        Only one batch of float lists is alive at a time.
+        '''
+        embedder = self.get_embedder(provider)
+        matrix = np.empty((len(data), self.get_size(provider)), dtype=dtype)
+        for start in range(0, len(data), batch_size):
+            batch = embedder.embed_documents(data[start:start + batch_size])
+            matrix[start:start + len(batch)] = batch
+        return matrix
 
     def get_size(self, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER) -> int:
-        return self.providers.get(provider, self.providers[DEFAULT_EMBEDDING_PROVIDER])[1]
\ No newline at end of file
+        return self.probe(provider)[0]
+
+    def is_normalized(self, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER) -> bool:
+        return self.probe(provider)[1]
+
+    def get_collection_name(self, base_name: AnyStr, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER) -> AnyStr:
+        '''
+        Get the collection of a provider. Format: {base_name}_{provider}_{dimension}
+        '''
+        provider = self.get_provider(provider)
+        return f"{base_name}_{provider}_{self.get_size(provider)}"
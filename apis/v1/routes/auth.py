@@ -14,12 +14,13 @@ from ..utils.response_fmt import jsonResponseFmt
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-# Login route with Google Access Token
+# Login route with Google Access Token or ID Token
 # @param: gtoken (str) - Google Access Token
+# @param: id_token (str) - Google ID Token
 # @return: token (str) - JWT Token
 @router.post("/login", response_model=LoginResponseInterface)
 async def login(data: AuthInterface):
-    token = login_control(data.gtoken)
+    token = await login_control(data.gtoken, data.id_token)
     return jsonResponseFmt({"token": token})
 
 
@@ -1,18 +1,22 @@
 from typing import Annotated, List
-from io import BytesIO
-from fastapi import APIRouter, Depends, BackgroundTasks, UploadFile
-from fastapi.responses import StreamingResponse
+import asyncio
+from fastapi import APIRouter, Depends, BackgroundTasks, UploadFile, Form, Request, Response, status
+from fastapi.responses import StreamingResponse, RedirectResponse
 from ..schemas.user_schema import UserSchema
 from ..middlewares.auth_middleware import get_current_user
 from ..controllers.knowledge_controller import (
     get_all_knowledges,
     upload_knowledge_data, 
     upload_knowledges_data,
-    download_knowledge_content,
+    get_knowledge_file,
+    stream_knowledge_content,
     delete_current_knowledge,
 )
 from ..schemas.knowledge_schema import KnowledgeSchema
 from ..utils.response_fmt import jsonResponseFmt
+from ..utils.utils import parse_range_header, content_disposition
+from ..utils.constants import STORAGE_SIGNED_URL_REDIRECT
+from ..providers import storage_db
 
 router = APIRouter(prefix="/knowledge", tags=["Knowledge"])
 
@@ -32,24 +36,67 @@ async def get_knowledge(knowledge_id: str, user: Annotated[UserSchema, Depends(g
 async def upload_single_knowledge_api(
     user: Annotated[UserSchema, Depends(get_current_user)],
     file: UploadFile,
+    project_id: Annotated[str, Form()],
     bg_tasks: BackgroundTasks,
 ):
-    watch_id = await upload_knowledge_data(user, file, bg_tasks)
+    watch_id = await upload_knowledge_data(user, file, project_id, bg_tasks)
     return jsonResponseFmt({"filename": file.filename, "status": "Uploaded successfully", "watch_id": watch_id})
 
 @router.post("/uploads/multiple")
 async def upload_multiple_knowledge_api(
     user: Annotated[UserSchema, Depends(get_current_user)],
     files: List[UploadFile],
+    project_id: Annotated[str, Form()],
     bg_tasks: BackgroundTasks,
 ):
-    watch_id = await upload_knowledges_data(user, files, bg_tasks)
+    watch_id = await upload_knowledges_data(user, files, project_id, bg_tasks)
     return jsonResponseFmt({"status": "All files uploaded successfully", "watch_id": watch_id})
 
 @router.get("/{knowledge_id}/download", response_class=StreamingResponse)
-async def download_knowledge_api(knowledge_id: str, user: Annotated[UserSchema, Depends(get_current_user)]):
-    knowledge_content = await download_knowledge_content(knowledge_id, user)  # Sử dụng hàm download_content
-    return StreamingResponse(BytesIO(knowledge_content), media_type="application/octet-stream", headers={"Content-Disposition": f"attachment; filename={knowledge_id}.txt"})
+async def download_knowledge_api(
+    knowledge_id: str,
+    request: Request,
+    user: Annotated[UserSchema, Depends(get_current_user)],
+    redirect: bool = STORAGE_SIGNED_URL_REDIRECT,
+):
+    knowledge, metadata = await asyncio.to_thread(get_knowledge_file, knowledge_id, user)
+    filename = knowledge.name or knowledge.path.split("/")[-1]
+
+    # Let the client download straight from the storage, when the storage can serve files
+    if redirect:
+        url = await asyncio.to_thread(storage_db.get_signed_url, knowledge.path, filename)
+        if url:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    size, etag = metadata["size"], f'"{metadata["etag"]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(filename),
+    }
+
+    # The client copy is still valid
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Ranges only apply to the same version of the file
+    if_range = request.headers.get("if-range")
+    byte_range = parse_range_header(request.headers.get("range"), size) if not if_range or if_range == etag else None
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        (start, end), status_code = byte_range, status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        stream_knowledge_content(knowledge.path, start, end),
+        status_code=status_code,
+        media_type=metadata["content_type"],
+        headers=headers,
+    )
 
 @router.delete("/{knowledge_id}")
 async def delete_knowledge_api(knowledge_id: str, user: Annotated[UserSchema, Depends(get_current_user)]):
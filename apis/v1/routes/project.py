@@ -7,7 +7,8 @@ from ..interfaces.project_interface import (
     CreateProjectInterface,
     UpdateProjectInterface,
     UpdateLastOpenedProjectInterface,
-    UpdateMemberProjectInterface
+    UpdateMemberProjectInterface,
+    ProjectIdsInterface
 )
 from ..schemas.user_schema import UserSchema
 from ..middlewares.auth_middleware import get_current_user
@@ -18,7 +19,9 @@ from ..controllers.project_controller import (
     update_current_project,
     update_member_project,
     delete_current_project,
-    restore_current_project
+    restore_current_project,
+    delete_current_projects,
+    restore_current_projects
 )
 from ..utils.response_fmt import jsonResponseFmt
 
@@ -74,6 +77,18 @@ async def restore_project(project_id: str, user: Annotated[UserSchema, Depends(g
     return jsonResponseFmt(None, f"Restore project with id {project_id} successfully")
 
 
+@router.put("/bulk/trash")
+async def delete_projects(data: ProjectIdsInterface, user: Annotated[UserSchema, Depends(get_current_user)]):
+    delete_current_projects(data.project_ids, user)
+    return jsonResponseFmt(None, f"Delete {len(data.project_ids)} projects successfully")
+
+
+@router.put("/bulk/restore")
+async def restore_projects(data: ProjectIdsInterface, user: Annotated[UserSchema, Depends(get_current_user)]):
+    restore_current_projects(data.project_ids, user)
+    return jsonResponseFmt(None, f"Restore {len(data.project_ids)} projects successfully")
+
+
 @router.delete("/purge/{project_id}")
 async def purge_project(project_id: str, user: Annotated[UserSchema, Depends(get_current_user)]):
     delete_current_project(project_id, user, is_purge=True)
@@ -1,11 +1,12 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends
+from typing import Annotated, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from ..schemas.user_schema import UserSchema
 from ..middlewares.auth_middleware import get_current_user
 from ..controllers.rag_controller import RAGController
 from ..schemas.knowledge_schema import KnowledgeSchema
-from ..utils.response_fmt import jsonResponseFmt
-from ..configs.llm_config import gpt_model, gemini_model
+from ..utils.response_fmt import jsonResponseFmt, sseEventFmt, ndjsonLineFmt
+from ..interfaces.rag_interface import AskBatchInterface
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
 
@@ -16,7 +17,9 @@ rag_controller = RAGController()
 async def ask_question(
     document_id: str,
     question: str,
-    user: Annotated[UserSchema, Depends(get_current_user)]
+    user: Annotated[UserSchema, Depends(get_current_user)],
+    stream: bool = False,
+    llm_name: str = None,
 ):
     """
     Ask a question regarding a specific knowledge document.
@@ -25,25 +28,85 @@ async def ask_question(
     - document_id: The ID of the document for context.
     - question: The user's question.
     - user: The current authenticated user.
+    - stream: Stream the answer tokens as Server-Sent Events.
+    - llm_name: The LLM to answer with (e.g., 'gpt' or 'gemini'), default to the project's LLM.
 
     Returns:
     - dict: Contains the question and the generated answer.
+    - text/event-stream: `token` events, then an `end` event with the full answer.
     """
     try:
-        response = await rag_controller.get_response(question, document_id, user)
+        if stream:
+            tokens = await rag_controller.stream_response(question, document_id, user, llm_name)
+            return StreamingResponse(
+                _stream_events(question, tokens),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+        response = await rag_controller.get_response(question, document_id, user, llm_name)
         return jsonResponseFmt(response)
+    except HTTPException as e:
+        return jsonResponseFmt(None, e.detail, code=e.status_code)
+    except Exception as e:
+        return jsonResponseFmt(None, str(e), code=500)
+
+
+async def _stream_events(question: str, tokens: AsyncIterator[str]):
+    # Forward tokens as they arrive, errors end the stream with an error event
+    chunks = []
+    try:
+        async for token in tokens:
+            chunks.append(token)
+            yield sseEventFmt({"token": token}, event="token")
+    except Exception as e:
+        yield sseEventFmt({"msg": str(e)}, event="error")
+        return
+    yield sseEventFmt({"question": question, "answers": rag_controller.str_parser.extract_answer("".join(chunks))}, event="end")
+
+@router.post("/ask/batch")
+async def ask_questions(
+    data: AskBatchInterface,
+    user: Annotated[UserSchema, Depends(get_current_user)],
+):
+    """
+    Ask many questions regarding a specific knowledge document.
+    Questions are retrieved in one batch, results are streamed as they complete.
+
+    Parameters:
+    - data: The ID of the document, the questions and the LLM to answer with.
+    - user: The current authenticated user.
+
+    Returns:
+    - application/x-ndjson: One line per question with its index, question and answers (or error).
+    """
+    try:
+        results = await rag_controller.stream_batch_response(data.questions, data.document_id, user, data.llm_name)
+        return StreamingResponse(
+            _stream_lines(results),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except HTTPException as e:
+        return jsonResponseFmt(None, e.detail, code=e.status_code)
     except Exception as e:
-        return jsonResponseFmt(None, str(e), status_code=500)
+        return jsonResponseFmt(None, str(e), code=500)
+
+
+async def _stream_lines(results: AsyncIterator[dict]):
+    async for result in results:
+        yield ndjsonLineFmt(result)
 
 @router.post("/set-llm")
 async def set_llm(
+    project_id: str,
     llm_name: str,
     user: Annotated[UserSchema, Depends(get_current_user)]
 ):
     """
-    Set the LLM to be used for answering questions.
+    Set the LLM used by default for questions of a project.
     
     Parameters:
+    - project_id: The project to set the LLM of.
     - llm_name: The name of the LLM to set (e.g., 'gpt' or 'gemini').
     - user: The current authenticated user.
 
@@ -51,11 +114,9 @@ async def set_llm(
     - dict: Confirmation that the LLM has been set.
     """
     try:
-        if llm_name not in ["gpt", "gemini"]:
-            return jsonResponseFmt(None, "Invalid LLM name", status_code=400)
-        
-        llm_model = gpt_model if llm_name == "gpt" else gemini_model
-        rag_controller.set_llm(llm_model)
-        return jsonResponseFmt({"status": f"LLM set to {llm_name} successfully."})
+        rag_controller.set_project_llm(project_id, llm_name, user)
+        return jsonResponseFmt({"status": f"LLM of project {project_id} set to {llm_name} successfully."})
+    except HTTPException as e:
+        return jsonResponseFmt(None, e.detail, code=e.status_code)
     except Exception as e:
-        return jsonResponseFmt(None, str(e), status_code=500)
+        return jsonResponseFmt(None, str(e), code=500)
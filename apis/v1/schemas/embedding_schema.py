@@ -2,21 +2,27 @@ from typing import List, AnyStr, Dict
 import uuid
 import numpy as np
 from fastapi import HTTPException, status
-from ..providers import word_embedding_provider, vector_db
+from ..providers import word_embedding_provider, vector_db, answer_cacher
 from ..utils.constants import DEFAULT_EMBEDDING_PROVIDER, DEFAULT_QUERY_LIMIT
 
 
 class VectorEmbeddingSchema:
+    '''
+    Vectors of a document, stored as one contiguous 2-D matrix.
+    Rows are zero-copy views, and the matrix is handed to Qdrant as is.
+    '''
+
     def __init__(
         self,
         ids: List[AnyStr],
-        vectors: List[List[float]],
+        vectors: List[List[float]] | np.ndarray,
         documents: List[AnyStr],
         payloads: List[Dict],
         provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER,
+        dtype: np.dtype = np.float32,
     ):
         self.ids = ids
-        self.vectors = [np.array(vector) for vector in vectors]
+        self.vectors = VectorEmbeddingSchema.to_matrix(vectors, dtype)
         self.documents = documents
         self.payloads = payloads
         self.provider = provider
@@ -24,66 +30,106 @@ class VectorEmbeddingSchema:
     def __iter__(self):
         return zip(self.ids, self.vectors, self.documents, self.payloads)
 
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def vector_db(self):
+        # Collection matching the embedding model of the vectors
+        return vector_db.for_provider(self.provider)
+
     @staticmethod
-    def from_documents(documents: List[AnyStr], payloads: List[Dict], provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER):
-        vectors = word_embedding_provider.embed(documents, provider)
+    def to_matrix(vectors: List[List[float]] | np.ndarray, dtype: np.dtype = np.float32) -> np.ndarray:
+        '''
+        Convert vectors to a single C-contiguous matrix, without copy when already compatible.
+        '''
+        if len(vectors) == 0:
+            return np.empty((0, 0), dtype=dtype)
+        if isinstance(vectors, np.ndarray):
+            return np.atleast_2d(np.ascontiguousarray(vectors, dtype=dtype))
+        return np.array(vectors, dtype=dtype, order="C")
+
+    @staticmethod
+    def from_documents(
+        documents: List[AnyStr],
+        payloads: List[Dict],
+        provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER,
+        dtype: np.dtype = np.float32,
+    ):
+        vectors = word_embedding_provider.embed_matrix(documents, provider, dtype=dtype)
         # Tạo ID ngẫu nhiên cho từng vector
         ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
-        return VectorEmbeddingSchema(ids, vectors, documents, payloads, provider)
+        return VectorEmbeddingSchema(ids, vectors, documents, payloads, provider, dtype)
 
     @staticmethod
-    def from_database(collection: AnyStr):
-        records = vector_db.get_all(collection)
+    def from_records(records: List, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER, dtype: np.dtype = np.float32):
+        # Fill the matrix row by row, no intermediate list of vectors is kept
+        size = len(records[0].vector) if len(records) != 0 else 0
+        vectors = np.empty((len(records), size), dtype=dtype)
         ids = []
-        vectors = []
         documents = []
         payloads = []
-        for record in records:
+        for i, record in enumerate(records):
             ids.append(record.id)
-            vectors.append(record.vector)
-            documents.append(record.payload["document"])
-            payloads.append(record.payload["payload"])
-        return VectorEmbeddingSchema(ids, vectors, documents, payloads)
+            vectors[i] = record.vector
+            documents.append(record.payload[vector_db.content_key])
+            payloads.append(record.payload[vector_db.metadata_key])
+        return VectorEmbeddingSchema(ids, vectors, documents, payloads, provider, dtype)
 
     @staticmethod
-    def from_query(collection: AnyStr, key: AnyStr, value: AnyStr):
-        records = vector_db.dynamic_search(collection, key, value)
-        ids = []
-        vectors = []
-        documents = []
-        payloads = []
-        for record in records:
-            ids.append(record.id)
-            vectors.append(record.vector)
-            documents.append(record.payload["document"])
-            payloads.append(record.payload["payload"])
-        return VectorEmbeddingSchema(ids, vectors, documents, payloads)
+    def from_database(provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER, dtype: np.dtype = np.float32):
+        records = vector_db.for_provider(provider).dynamic_search()
+        return VectorEmbeddingSchema.from_records(records, provider, dtype)
+
+    @staticmethod
+    def from_query(key: AnyStr, value: AnyStr, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER, dtype: np.dtype = np.float32):
+        records = vector_db.for_provider(provider).dynamic_search(key, value)
+        return VectorEmbeddingSchema.from_records(records, provider, dtype)
+
+    @staticmethod
+    def delete_by_knowledge(knowledge_id: AnyStr, provider: AnyStr = DEFAULT_EMBEDDING_PROVIDER):
+        try:
+            vector_db.for_provider(provider).delete_by_filter(knowledge_id=knowledge_id)
+            answer_cacher.invalidate(knowledge_id)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Failed to delete vectors: {str(e)}"
+            )
+
+    def _invalidate_answers(self):
+        # Answers cached on the knowledges of these vectors are no longer valid
+        answer_cacher.invalidates(list({
+            payload["knowledge_id"] for payload in self.payloads
+            if payload and payload.get("knowledge_id")
+        }))
 
-    def upload(self, collection: AnyStr):
+    def upload(self):
         try:
-            vector_db.upload_documents_and_load_collection(self.documents, self.vectors, self.payloads, collection)
+            self.vector_db.upsert(self.ids, self.vectors, self.documents, self.payloads)
+            self._invalidate_answers()
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Failed to upload vectors: {str(e)}"
             )
 
-    def search(
+    async def search(
         self,
-        collection: AnyStr,
         limit: int = DEFAULT_QUERY_LIMIT,
     ):
         try:
-            return vector_db.search(collection, self.vectors, limit)
+            return await self.vector_db.search_batch(self.vectors, k=limit)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Failed to search vectors: {str(e)}"
             )
 
-    def delete(self, collection: AnyStr):
+    def delete(self):
         try:
-            vector_db.delete(collection, self.ids)
+            self.vector_db.delete(self.ids)
+            self._invalidate_answers()
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -92,4 +138,4 @@ class VectorEmbeddingSchema:
 
     def get_retriever(self):
         """Trả về một retriever để tìm kiếm trong cơ sở dữ liệu."""
-        return vector_db.get_retriever()
+        return self.vector_db.get_retriever()
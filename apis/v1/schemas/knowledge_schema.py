@@ -1,13 +1,14 @@
 from typing import AnyStr, Dict
 import enum 
 from pydantic import BaseModel, Field
-from ..providers import storage_db, knowledge_db
+from ..providers import storage_db, knowledge_db, answer_cacher
 from ..utils.utils import get_current_time
 
 
 class KnowledgeModel(BaseModel):
     id: str = Field(None, title="Knowledge ID")
     name: str = Field("", title="Knowledge Name")
+    project_id: str = Field(None, title="Knowledge Project ID")
     path: str = Field("", title="Knowledge Path")
     url: str = Field("", title="Knowledge URL")
     content: str = Field("", title="Knowledge Content")
@@ -19,12 +20,14 @@ class KnowledgeSchema:
     def __init__(self,
                  knowledge_id: AnyStr = None,
                  name: AnyStr = "",
+                 project_id: AnyStr = None,
                  path: AnyStr = "",
                  url: AnyStr = "",
                  content: AnyStr = "",
                  upload_at: AnyStr = get_current_time()):
         self.id = knowledge_id
         self.name = name
+        self.project_id = project_id
         self.path = path
         self.url = url
         self.content = content
@@ -34,6 +37,7 @@ class KnowledgeSchema:
     def to_dict(self, include_id=True):
         data_dict = {
             "name": self.name,
+            "project_id": self.project_id,
             "path": self.path,
             "url": self.url,
             "content": self.content,
@@ -46,8 +50,9 @@ class KnowledgeSchema:
     @staticmethod
     def from_dict(data: Dict):
         return KnowledgeSchema(
-            cv_id=data.get("id"),
+            knowledge_id=data.get("id"),
             name=data.get("name"),
+            project_id=data.get("project_id"),
             path=data.get("path"),
             url=data.get("url"),
             content=data.get("content"),
@@ -83,18 +88,13 @@ class KnowledgeSchema:
             "url": url
         })
     
-    def download_content(self) -> AnyStr:
-        """Tải nội dung của file đã upload."""
-        try:
-            return storage_db.download(self.path)
-        except Exception as e:
-            return None
-
     def delete_knowledge(self) -> bool:
         """Xóa file đã upload và document khỏi Firebase."""
         try:
             # Xóa document từ Firebase
             knowledge_db.delete(self.id)
+            # Cached answers are no longer valid
+            answer_cacher.invalidate(self.id)
             # Xóa file từ storage (nếu cần)
             storage_db.remove(self.path)  # Phương thức xóa file trong storage
             return True  # Trả về True nếu xóa thành công
@@ -111,6 +111,7 @@ class KnowledgeSchema:
             # Cập nhật document trong Firebase
             storage_db.update(self.id, new_data)  # Cập nhật dữ liệu mới vào Firebase
             self.path = new_path  # Cập nhật đường dẫn file mới
+            answer_cacher.invalidate(self.id)
             return True  # Trả về True nếu cập nhật thành công
         except Exception as e:
             return False  # Trả về False nếu có lỗi
@@ -119,4 +120,6 @@ class KnowledgeSchema:
         self.content = content
         knowledge_db.update(self.id, {
             "content": content
-        })
\ No newline at end of file
+        })
+        # Content is re-ingested, cached answers are no longer valid
+        answer_cacher.invalidate(self.id)
\ No newline at end of file
@@ -1,8 +1,8 @@
 from typing import Dict, AnyStr, List
 from pydantic import BaseModel, Field
 from ..schemas.user_schema import UserSchema, UserMinimalModel
-from ..providers import project_db, memory_cacher
-from ..utils.utils import get_current_time
+from ..providers import project_db, user_db, memory_cacher
+from ..utils.utils import get_current_time, apply_array_delta
 
 
 class ProjectModel(BaseModel):
@@ -14,6 +14,7 @@ class ProjectModel(BaseModel):
     members: list[UserMinimalModel] = Field(..., title="Project Members")
     positions: list[str] = Field(..., title="Project Positions")
     last_opened: str = Field(..., title="Project Last Opened")
+    llm: str = Field(None, title="Project LLM")
 
 
 class ProjectSchema:
@@ -31,6 +32,7 @@ class ProjectSchema:
         members: List[AnyStr] | List[UserSchema] = [],
         positions: List[AnyStr] = [],
         last_opened: AnyStr = get_current_time(),
+        llm: AnyStr = None,
     ):
         self.id = project_id
         self.name = name
@@ -40,6 +42,7 @@ class ProjectSchema:
         self.members = members
         self.positions = positions
         self.last_opened = last_opened
+        self.llm = llm
 
     def to_dict(self, include_id=True):
         data_dict = {
@@ -50,6 +53,7 @@ class ProjectSchema:
             "members": [member.to_dict(minimal=True) if isinstance(member, UserSchema) else member for member in self.members],
             "positions": self.positions,
             "last_opened": self.last_opened,
+            "llm": self.llm,
         }
         if include_id:
             data_dict["id"] = self.id
@@ -66,6 +70,7 @@ class ProjectSchema:
             members=data.get("members"),
             positions=data.get("positions"),
             last_opened=data.get("last_opened"),
+            llm=data.get("llm"),
         )
 
     @staticmethod
@@ -92,7 +97,7 @@ class ProjectSchema:
     @staticmethod
     def find_all_by_ids(project_ids: List[AnyStr]):
         projects = project_db.get_all_by_ids(ids=project_ids)
-        return [ProjectSchema.from_dict(project) for project in projects]
+        return [ProjectSchema.from_dict(project) for project in projects if project]
 
     def create_project(self):
         project_id = project_db.create(self.to_dict(include_id=False))
@@ -105,22 +110,26 @@ class ProjectSchema:
     def update_project(self, data):
         project_db.update(self.id, data)
 
-    def update_members(self, members: List[AnyStr], is_add: bool = True):
-        if is_add:
-            self.members = list(set(self.members) | set(members))
-        else:
-            self.members = list(set(self.members) - set(members))
-        # Add data to cache
-        project_db.update(self.id, {"members": self.members})
+    def update_members(self, members: List[AnyStr], is_add: bool = True, shared_uids: List[AnyStr] = []):
+        '''
+        Add or remove members of the project, and the project in the shared list of the given users.
+        The project and the users are updated in one batched write, they are never out of sync.
+        '''
+        # Only the delta is written, concurrent updates are not lost
+        project_db.update_arrays([
+            (project_db, self.id, "members", members, is_add),
+            *[(user_db, uid, "shared", [self.id], is_add) for uid in shared_uids],
+        ])
+        self.members = apply_array_delta(self.members, members, is_add)
 
     def delete_project(self):
         project_db.delete(self.id)
 
     def update_positions(self, positions_id: AnyStr, is_add: bool):
+        # Only the delta is written, concurrent updates are not lost
         if is_add:
-            self.positions.append(positions_id)
+            project_db.array_append(self.id, "positions", [positions_id])
         else:
-            self.positions.remove(positions_id)
-        # Add data to cache
-        project_db.update(self.id, {"positions": self.positions})
+            project_db.array_remove(self.id, "positions", [positions_id])
+        self.positions = apply_array_delta(self.positions, [positions_id], is_add)
         return self
\ No newline at end of file
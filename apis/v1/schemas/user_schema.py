@@ -1,7 +1,7 @@
 from typing import Dict, AnyStr, List
 from pydantic import BaseModel, Field
 from ..providers import user_db
-from ..utils.utils import get_current_time
+from ..utils.utils import get_current_time, apply_array_delta
 from ..utils.constants import PLACEHOLDER_IMAGE
 
 
@@ -11,6 +11,8 @@ class UserModel(BaseModel):
     email: str = Field(..., title="User Email")
     avatar: str = Field(..., title="User Avatar")
     projects: list[str] = Field(None, title="User Projects")
+    shared: list[str] = Field(None, title="Projects Shared With User")
+    trash: list[str] = Field(None, title="User Deleted Projects")
     created_at: str = Field(..., title="User Created At")
 
 
@@ -29,6 +31,8 @@ class UserSchema:
         email: AnyStr = "",
         avatar: AnyStr = PLACEHOLDER_IMAGE,
         projects: List[AnyStr] = [],
+        shared: List[AnyStr] = [],
+        trash: List[AnyStr] = [],
         created_at: AnyStr = get_current_time(),
     ):
         self.id = uid
@@ -36,6 +40,8 @@ class UserSchema:
         self.email = email
         self.avatar = avatar
         self.projects = projects
+        self.shared = shared
+        self.trash = trash
         self.created_at = created_at
 
     def to_dict(self, include_id=True, minimal=False):
@@ -46,6 +52,8 @@ class UserSchema:
         }
         if not minimal:
             data_dict["projects"] = self.projects
+            data_dict["shared"] = self.shared
+            data_dict["trash"] = self.trash
             data_dict["created_at"] = self.created_at
         if include_id:
             data_dict["id"] = self.id
@@ -58,7 +66,9 @@ class UserSchema:
             name=data.get("name"),
             email=data.get("email"),
             avatar=data.get("avatar"),
-            projects=data.get("projects"),
+            projects=data.get("projects") or [],
+            shared=data.get("shared") or [],
+            trash=data.get("trash") or [],
             created_at=data.get("created_at"),
         )
 
@@ -97,10 +107,24 @@ class UserSchema:
         return self
 
     def update_user_projects(self, project_id: AnyStr, is_add: bool, key: AnyStr = "projects"):
+        # Only the delta is written, the local list follows the same semantics
         if is_add:
-            setattr(self, key, list(
-                set(getattr(self, key)) | set([project_id])))
+            user_db.array_append(self.id, key, [project_id])
         else:
-            setattr(self, key, list(
-                set(getattr(self, key)) - set([project_id])))
-        user_db.update(self.id, {f"{key}": getattr(self, key)})
\ No newline at end of file
+            user_db.array_remove(self.id, key, [project_id])
+        setattr(self, key, apply_array_delta(getattr(self, key), [project_id], is_add))
+
+    def move_projects(self, project_ids: List[AnyStr], source: AnyStr, target: AnyStr):
+        '''
+        Move projects from a list of the user to another (e.g. projects -> trash) in one atomic write.
+        '''
+        user_db.array_move(self.id, source, target, project_ids)
+        setattr(self, source, apply_array_delta(getattr(self, source), project_ids, is_add=False))
+        setattr(self, target, apply_array_delta(getattr(self, target), project_ids, is_add=True))
+        return self
+
+    def trash_projects(self, project_ids: List[AnyStr]):
+        return self.move_projects(project_ids, source="projects", target="trash")
+
+    def restore_projects(self, project_ids: List[AnyStr]):
+        return self.move_projects(project_ids, source="trash", target="projects")
@@ -1,21 +1,99 @@
-# Google Verify Access Token URL
-GOOGLE_VERIFY_URL = "https://www.googleapis.com/oauth2/v3/userinfo?access_token="
+import os
+
+# Google Verify Access Token URL, overridable to point at a local stub
+GOOGLE_VERIFY_URL = os.environ.get(
+    "GOOGLE_VERIFY_URL", "https://www.googleapis.com/oauth2/v3/userinfo?access_token=")
+# Google ID token signing keys (JWKS)
+GOOGLE_CERTS_URL = os.environ.get("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+GOOGLE_JWKS_REFRESH_INTERVAL = 60 * 60
+GOOGLE_HTTP_TIMEOUT = float(os.environ.get("GOOGLE_HTTP_TIMEOUT", 10))
 
 # Firebase collections
 USER_COLLECTION = "Users"
 PROJECT_COLLECTION = "Projects"
 KNOWLEDGE_COLLECTION = "Knowledges"
 
+# Maximum writes of one Firestore batch
+FIRESTORE_BATCH_LIMIT = 500
+
 # Firebase storage
 KNOWLEDGE_STORAGE = "Knowledge"
+# Resumable upload chunks must be a multiple of 256 KiB
+STORAGE_CHUNK_SIZE = int(os.environ.get("STORAGE_CHUNK_SIZE", 8 * 1024 * 1024))
+# Files above the threshold are uploaded as parallel parts
+STORAGE_PARALLEL_THRESHOLD = int(os.environ.get("STORAGE_PARALLEL_THRESHOLD", 32 * 1024 * 1024))
+STORAGE_MAX_WORKERS = int(os.environ.get("STORAGE_MAX_WORKERS", 8))
+STORAGE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Redirect downloads to a signed URL, bytes are served by the storage instead of the API
+STORAGE_SIGNED_URL_REDIRECT = os.environ.get("STORAGE_SIGNED_URL_REDIRECT", "false").lower() == "true"
+STORAGE_SIGNED_URL_EXPIRATION = 15 * 60
+# Local disk storage
+STORAGE_LOCAL_DIR = os.environ.get("STORAGE_LOCAL_DIR", os.path.join("data", "storage"))
+STORAGE_LOCAL_BASE_URL = os.environ.get("STORAGE_LOCAL_BASE_URL", "/storage")
 
 # Qdrant vectors
-DEFAULT_EMBEDDING_PROVIDER = "embedder"
-DEFAULT_EMBEDDING_DIM = 1024
+KNOWLEDGE_VECTOR_COLLECTION = "KNOWLEDGE"
+DEFAULT_EMBEDDING_PROVIDER = "hgf"
+EMBEDDING_BATCH_SIZE = 256
 DEFAULT_QUERY_LIMIT = 10
 DEFAULT_SPACE_NAME = "default"
+VECTOR_DB_HEALTH_CHECK_INTERVAL = 30
+DEFAULT_RETRIEVER_K = 3
+DEFAULT_SCORE_THRESHOLD = None
+VECTOR_FILTER_FIELDS = ["knowledge_id", "project_id"]
+
+# RAG context assembly
+RAG_FETCH_K = 20
+RAG_CANDIDATE_K = 8
+RAG_MMR_LAMBDA = 0.5
+RAG_CONTEXT_TOKEN_BUDGET = int(os.environ.get("RAG_CONTEXT_TOKEN_BUDGET", 1500))
+# One of: none, mmr, cross-encoder
+RAG_RERANKER = os.environ.get("RAG_RERANKER", "mmr")
+
+# RAG batch questions
+RAG_BATCH_MAX_QUESTIONS = 100
+RAG_BATCH_CONCURRENCY = int(os.environ.get("RAG_BATCH_CONCURRENCY", 8))
+
+# RAG answer cache
+RAG_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get("RAG_CACHE_SIMILARITY_THRESHOLD", 0.95))
+RAG_CACHE_MAX_ENTRIES = 256
+RAG_CACHE_EXPIRATION = 60 * 60 * 24
+
+# RAG conversation memory
+RAG_HISTORY_MAX_TURNS = 50
+RAG_HISTORY_TOKEN_BUDGET = int(os.environ.get("RAG_HISTORY_TOKEN_BUDGET", 1000))
+RAG_HISTORY_EXPIRATION = 60 * 60 * 24 * 7
+RAG_HISTORY_SUMMARIZE = os.environ.get("RAG_HISTORY_SUMMARIZE", "false").lower() == "true"
+
+# Verified tokens cache
+AUTH_CACHE_EXPIRATION = int(os.environ.get("AUTH_CACHE_EXPIRATION", 300))
+AUTH_CACHE_MAX_ENTRIES = 10000
+
+# Telemetry
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+# Share of operations logged at debug level
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 0.01))
 
 # Utilities
 PLACEHOLDER_IMAGE = "https://i.pravatar.cc/150"
 DEFAULT_LLM_PROVIDER = "gemini"
+LLM_CONCURRENCY_LIMIT = int(os.environ.get("LLM_CONCURRENCY_LIMIT", 16))
+LLM_DEADLINE = float(os.environ.get("LLM_DEADLINE", 60))
+LLM_HEDGE_PERCENTILE = 0.95
+LLM_HEDGE_MIN_SAMPLES = 20
+LLM_LATENCY_WINDOW = 200
+# USD per 1K (prompt, completion) tokens, used to estimate spend
+LLM_TOKEN_PRICES = {
+    "gpt-3.5-turbo-0125": (0.0005, 0.0015),
+    "gemini-pro": (0.0005, 0.0015),
+}
+LLM_OTEL_ENABLED = os.environ.get("LLM_OTEL_ENABLED", "false").lower() == "true"
+DEFAULT_RAG_SYSTEM_PROMPT = (
+    "You are a sales assistant answering questions about product documents. "
+    "Only use the given context and previous conversation to answer. "
+    "If the answer is not in the context, say that you don't know. "
+    "Write the final answer after `Answer:`."
+)
 ALLOWED_EXTENSIONS = ["csv", "txt","docx"]
\ No newline at end of file
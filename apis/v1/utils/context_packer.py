@@ -0,0 +1,64 @@
+from typing import List
+from langchain_core.documents import Document
+from .utils import count_tokens
+from ..configs.reranker_config import get_cross_encoder
+
+
+def rerank_documents(question: str, documents: List[Document], top_n: int) -> List[Document]:
+    '''
+    Rerank documents with the local cross-encoder, keep the `top_n` best.
+    '''
+    if len(documents) == 0:
+        return documents
+    scores = get_cross_encoder().predict([(question, doc.page_content) for doc in documents])
+    ranked = sorted(zip(scores, range(len(documents))), key=lambda item: item[0], reverse=True)
+    return [documents[i] for _, i in ranked[:top_n]]
+
+
+def _get_overlap(head: str, tail: str, min_overlap: int, max_overlap: int) -> int:
+    # Length of the longest suffix of head which is a prefix of tail
+    for size in range(min(len(head), len(tail), max_overlap), min_overlap - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+
+def merge_overlapping_documents(documents: List[Document], min_overlap: int = 20, max_overlap: int = 400) -> List[Document]:
+    '''
+    Merge adjacent chunks sharing an overlap, as produced by the text splitter.
+    A merged chunk keeps the rank of its first chunk.
+    '''
+    merged = [Document(page_content=doc.page_content, metadata=dict(doc.metadata)) for doc in documents]
+    changed = True
+    while changed:
+        changed = False
+        for i, head in enumerate(merged):
+            for j, tail in enumerate(merged):
+                if i == j:
+                    continue
+                size = _get_overlap(head.page_content, tail.page_content, min_overlap, max_overlap)
+                if size == 0:
+                    continue
+                head.page_content += tail.page_content[size:]
+                head.metadata["_id"] = f"{head.metadata.get('_id')}+{tail.metadata.get('_id')}"
+                merged.pop(j)
+                changed = True
+                break
+            if changed:
+                break
+    return merged
+
+
+def pack_documents(documents: List[Document], token_budget: int) -> List[Document]:
+    '''
+    Keep documents in rank order while they fit in the token budget.
+    '''
+    packed = []
+    used = 0
+    for doc in documents:
+        tokens = count_tokens(doc.page_content)
+        if used + tokens > token_budget:
+            continue
+        packed.append(doc)
+        used += tokens
+    return packed
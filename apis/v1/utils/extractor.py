@@ -2,6 +2,7 @@ import os
 from fastapi import HTTPException, status
 from langchain_community.document_loaders import Docx2txtLoader, CSVLoader
 from typing import List
+from langchain_core.documents import Document
 import pandas as pd
 from langchain.text_splitter import RecursiveCharacterTextSplitter  # Nhập lớp này
 
@@ -47,6 +48,13 @@ def _load_docx_txt_csv(filepath: str):
     text_chunks = text_splitter.split_text(content)
     return [{"page_content": chunk} for chunk in text_chunks]
 
+def get_document_splits(filepath: str) -> List[Document]:
+    # Chunks of the file as documents, ready to be embedded
+    return [
+        Document(page_content=_data["page_content"]) if isinstance(_data, dict) else _data
+        for _data in _load_docx_txt_csv(filepath)
+    ]
+
 def get_document_content(filepath: str) -> str:
     data = _load_docx_txt_csv(filepath)
 
@@ -1,7 +1,12 @@
 from typing import Callable
 import time
+import random
+import inspect
 import logging
+import functools
 from colorama import Fore, Style
+from .metrics import operation_latency, operation_errors
+from .constants import METRICS_ENABLED, LOG_SAMPLE_RATE
 
 
 logger = logging.getLogger("uvicorn.info")
@@ -16,45 +21,87 @@ def prefix_color_map(prefix: str):
         "VECTOR_DATABASE": Fore.RED,
         "LLM": Fore.CYAN,
         "CACHE": Fore.BLUE,
+        "STORAGE": Fore.YELLOW,
     }.get(prefix, Fore.WHITE)
     return f"[{_mapped_color + prefix + Style.RESET_ALL}]"
 
 
-def logger_decorator(prefix: str = "FEATURE"):
+def should_log_sample(sample_rate: float = LOG_SAMPLE_RATE) -> bool:
     """
-    Decorator for logging the execution time of a function
+    Decide whether to log one sampled debug message, only when debug logs are enabled
     """
+    return logger.isEnabledFor(logging.DEBUG) and random.random() < sample_rate
+
+
+def logger_decorator(prefix: str = "FEATURE", enabled: bool = METRICS_ENABLED):
+    """
+    Decorator recording the execution time and errors of a method as Prometheus metrics,
+    labeled by provider (prefix), collection and method.
+    A sample of the executions is logged at debug level.
+    The method is returned unwrapped when metrics are disabled.
+    """
+    provider = prefix.lower()
+
     def _wrapper(func: Callable):
+        if not enabled:
+            return func
+
+        method = func.__name__
+
+        def _get_collection(self) -> str:
+            return str(getattr(self, "collection_name", None) or getattr(self, "directory", ""))
+
+        def _record(self, started: float, failed: bool):
+            _e = time.perf_counter() - started
+            collection = _get_collection(self)
+            operation_latency.labels(provider, collection, method).observe(_e)
+            if failed:
+                operation_errors.labels(provider, collection, method).inc()
+            if should_log_sample():
+                logger.debug(f"{prefix_color_map(prefix)} ({method}) executed [{_e:.2f}s]")
+
+        # Await coroutine functions so the real execution time is recorded
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def _async_inner(self, *args, **kwargs):
+                _s, failed = time.perf_counter(), True
+                try:
+                    result = await func(self, *args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    _record(self, _s, failed)
+            return _async_inner
+
+        @functools.wraps(func)
         def _inner(self, *args, **kwargs):
-            _s = time.perf_counter()
-            result = func(self, *args, **kwargs)
-            _e = time.perf_counter() - _s
-            logger.info(
-                f"{prefix_color_map(prefix)} ({func.__name__}) executed [{_e:.2f}s]")
-            return result
+            _s, failed = time.perf_counter(), True
+            try:
+                result = func(self, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                _record(self, _s, failed)
         return _inner
     return _wrapper
 
 
+def _log_sampled(prefix: str, msg: str):
+    if should_log_sample():
+        logger.debug(f"{prefix_color_map(prefix)} {msg}")
+
+
 def log_database(msg: str):
-    prefix = f"{Fore.YELLOW}DATABASE{Style.RESET_ALL}:"
-    print(prefix + " ", end="")
-    print(msg)
+    _log_sampled("DATABASE", msg)
 
 
 def log_qdrant(msg: str):
-    prefix = f"{Fore.RED}QDRANT{Style.RESET_ALL}:"
-    print(prefix + " "*3, end="")
-    print(msg)
+    _log_sampled("VECTOR_DATABASE", msg)
 
 
 def log_llm(msg: str):
-    prefix = f"{Fore.CYAN}LLM{Style.RESET_ALL}:"
-    print(prefix + " "*6, end="")
-    print(msg)
+    _log_sampled("LLM", msg)
 
 
 def log_cache(msg: str):
-    prefix = f"{Fore.BLUE}CACHE{Style.RESET_ALL}:"
-    print(prefix + " "*4, end="")
-    print(msg)
\ No newline at end of file
+    _log_sampled("CACHE", msg)
@@ -0,0 +1,66 @@
+from prometheus_client import Counter, Histogram
+
+
+# Latency buckets of LLM calls, in seconds
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+llm_request_latency = Histogram(
+    "llm_request_latency_seconds",
+    "Latency of LLM calls, from start to last token.",
+    ["provider", "model", "status"],
+    buckets=LLM_LATENCY_BUCKETS,
+)
+llm_time_to_first_token = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time to the first streamed token of LLM calls.",
+    ["provider", "model"],
+    buckets=LLM_LATENCY_BUCKETS,
+)
+llm_requests = Counter(
+    "llm_requests",
+    "LLM calls by outcome.",
+    ["provider", "model", "status"],
+)
+llm_tokens = Counter(
+    "llm_tokens",
+    "Prompt and completion tokens of LLM calls.",
+    ["provider", "model", "type"],
+)
+llm_cost = Counter(
+    "llm_cost_usd",
+    "Estimated spend of LLM calls.",
+    ["provider", "model"],
+)
+
+# Latency buckets of database, vector database and storage operations, in seconds
+OPERATION_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+operation_latency = Histogram(
+    "operation_latency_seconds",
+    "Latency of provider operations.",
+    ["provider", "collection", "method"],
+    buckets=OPERATION_LATENCY_BUCKETS,
+)
+operation_errors = Counter(
+    "operation_errors",
+    "Failed provider operations.",
+    ["provider", "collection", "method"],
+)
+rag_answer_cache_hits = Counter(
+    "rag_answer_cache_hits",
+    "RAG questions answered from the answer cache.",
+)
+rag_answer_cache_misses = Counter(
+    "rag_answer_cache_misses",
+    "RAG questions not found in the answer cache.",
+)
+rag_answer_cache_saved_tokens = Counter(
+    "rag_answer_cache_saved_tokens",
+    "LLM tokens saved by answers served from the answer cache.",
+)
+rag_stage_latency = Histogram(
+    "rag_stage_latency_seconds",
+    "Latency of the stages of RAG requests.",
+    ["stage"],
+    buckets=LLM_LATENCY_BUCKETS,
+)
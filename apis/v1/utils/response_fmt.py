@@ -1,4 +1,5 @@
 from typing import Any
+import orjson
 from fastapi.responses import JSONResponse
 
 
@@ -6,4 +7,15 @@ def jsonResponseFmt(data: Any, msg: str = "Success", code: int = 200, **kwargs):
     return JSONResponse({
         "msg": msg,
         "data": data
-    }, code, **kwargs)
\ No newline at end of file
+    }, code, **kwargs)
+
+
+def sseEventFmt(data: Any, event: str = None) -> str:
+    # Format one Server-Sent Event
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {orjson.dumps(data).decode()}\n\n"
+
+
+def ndjsonLineFmt(data: Any) -> bytes:
+    # Format one line of newline-delimited JSON
+    return orjson.dumps(data) + b"\n"
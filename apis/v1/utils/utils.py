@@ -1,5 +1,8 @@
 from typing import List
 import datetime
+import functools
+import urllib.parse
+import tiktoken
 from fastapi import HTTPException, status
 from pydantic  import Field, create_model
 from ..utils.constants import ALLOWED_EXTENSIONS
@@ -11,6 +14,66 @@ def get_current_time() -> str:
     '''
     return datetime.datetime.now().isoformat()
 
+@functools.lru_cache(maxsize=1)
+def _get_token_encoder():
+    # Encoder files may be unavailable offline, fallback to estimation
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    '''
+    Count the tokens of the text, estimated as 4 characters per token without encoder.
+    '''
+    encoder = _get_token_encoder()
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+def apply_array_delta(current: List | None, values: List, is_add: bool) -> List:
+    '''
+    Add (without duplicates) or remove values of an array, with the same semantics as Firestore array transforms.
+    '''
+    current = list(current or [])
+    if is_add:
+        return current + [value for value in dict.fromkeys(values) if value not in current]
+    return [value for value in current if value not in values]
+
+def parse_range_header(range_header: str | None, size: int) -> tuple[int, int] | None:
+    '''
+    Parse a single `bytes=start-end` range of a file of the given size.
+    Return the inclusive (start, end), or None to serve the whole file.
+    '''
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    start, _, end = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start == "":
+            # Suffix range: the last bytes of the file
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    '''
+    Build a Content-Disposition header value for any file name.
+    Old clients read the ASCII `filename`, the others the UTF-8 `filename*` (RFC 6266).
+    '''
+    fallback = "".join(char if " " <= char <= "~" and char not in '"\\' else "_" for char in filename)
+    return f'{disposition}; filename="{fallback}"; filename*=UTF-8\'\'{urllib.parse.quote(filename, safe="")}'
+
 def validate_file_extension(file_name: str, allowed_extensions: List[str] = ALLOWED_EXTENSIONS):
     if not file_name.lower().endswith(tuple(allowed_extensions)):
         raise HTTPException(